@@ -1,42 +1,121 @@
+import argparse
 import pandas as pd
-import requests
+import numpy as np
+import httpx
+import msgspec
+import xlsxwriter
+import asyncio
+import hashlib
+import logging
+import shelve
 import time
 import os
+import random
 import re
 
 
-def clean_address(address):
+logger = logging.getLogger(__name__)
+
+KAKAO_ADDRESS_URL = "https://dapi.kakao.com/v2/local/search/address.json"
+
+# 동시 요청 수 / 초당 최대 요청 수 (Kakao API 호출 제한)
+MAX_CONCURRENCY = 10
+RATE_LIMIT_PER_SEC = 10
+
+# 429/5xx/네트워크 오류 시 재시도 횟수와 지수 백오프 대기 시간 (초)
+MAX_RETRIES = 3
+RETRY_BASE_DELAY = 0.1
+RETRY_MAX_DELAY = 2.0
+
+# 주소별 geocoding 결과 캐시 유지 기간 (30일)
+CACHE_EXPIRE_SECONDS = 30 * 86400
+NOT_FOUND_ERROR = "주소를 찾을 수 없음"
+
+# 한 번에 요청하고 캐시에 반영하는 주소 수 (중단 시 최대 이만큼만 다시 요청)
+CHUNK_SIZE = 500
+
+# 주소 정리용 정규식 (괄호와 괄호 안의 내용, 연속 공백), 컬럼 단위 str.replace에서 사용
+_PAREN_RE = re.compile(r'\([^)]*\)')
+_WS_RE = re.compile(r'\s+')
+
+
+class KakaoDocument(msgspec.Struct):
+    """Kakao 주소 검색 결과 중 사용하는 필드 (x: 경도, y: 위도)"""
+    x: str
+    y: str
+
+
+class KakaoAddressResponse(msgspec.Struct):
+    documents: list[KakaoDocument]
+
+
+# 응답 형태가 고정되어 있으므로 필요한 필드만 바로 디코딩 (response.json()보다 빠름)
+_KAKAO_DECODER = msgspec.json.Decoder(KakaoAddressResponse)
+
+
+class RateLimiter:
     """
-    주소를 정리하여 geocoding이 잘 되도록 함
+    초당 요청 수를 제한하는 비동기 리미터
+    요청 사이 간격을 1/rate 초로 맞춰서 고정 sleep 없이 호출 제한을 지킴
     """
-    if pd.isna(address):
-        return None
-    
-    # 괄호와 괄호 안의 내용 제거 (건물명, 호수 등)
-    address = re.sub(r'\([^)]*\)', '', address)
-    
-    # 여러 공백을 하나로 
-    address = re.sub(r'\s+', ' ', address)
-    
-    # 앞뒤 공백 제거
-    address = address.strip()
-    
-    return address
 
+    def __init__(self, rate, period=1.0):
+        self._interval = period / rate
+        self._next_time = 0.0
+        self._lock = asyncio.Lock()
 
-def get_coordinates(address, api_key):
-    url = "https://dapi.kakao.com/v2/local/search/address.json"
-    headers = {"Authorization": f"KakaoAK {api_key}"}
-    params = {"query": address}
-    
+    async def acquire(self):
+        """다음 요청을 보내도 되는 시점까지 대기"""
+        async with self._lock:
+            now = asyncio.get_running_loop().time()
+            wait = self._next_time - now
+            if wait > 0:
+                await asyncio.sleep(wait)
+                now = self._next_time
+            self._next_time = now + self._interval
+
+    async def __aenter__(self):
+        await self.acquire()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+
+def create_client(api_key):
+    """
+    Kakao API용 AsyncClient 생성
+    하나의 클라이언트를 공유해서 매 요청마다 TCP/TLS 연결을 새로 맺지 않도록 함
+    """
+    return httpx.AsyncClient(
+        headers={"Authorization": f"KakaoAK {api_key}"},
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+        timeout=10.0
+    )
+
+
+def _backoff_delay(attempt, response=None):
+    """
+    재시도 전 대기 시간 계산
+    Retry-After 헤더가 있으면 그 값을 따르고, 없으면 지터를 더한 지수 백오프
+    """
+    if response is not None:
+        retry_after = response.headers.get('Retry-After')
+        if retry_after:
+            try:
+                return max(float(retry_after), 0.0)
+            except ValueError:
+                pass
+    return min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt) + random.uniform(0, RETRY_BASE_DELAY)
+
+
+def _parse_response(response):
+    """Kakao 응답을 (위도, 경도, 오류)로 변환"""
     try:
-        response = requests.get(url, headers=headers, params=params)
-        
         if response.status_code == 200:
-            result = response.json()
-            if result['documents']:
-                x = result['documents'][0]['x']  # 경도
-                y = result['documents'][0]['y']  # 위도
+            result = _KAKAO_DECODER.decode(response.content)
+            if result.documents:
+                x = result.documents[0].x  # 경도
+                y = result.documents[0].y  # 위도
                 return float(y), float(x), None
         elif response.status_code == 401:
             return None, None, "API 키 오류 (401)"
@@ -45,25 +124,147 @@ def get_coordinates(address, api_key):
         else:
             return None, None, f"HTTP {response.status_code}"
         
-        return None, None, "주소를 찾을 수 없음"
+        return None, None, NOT_FOUND_ERROR
     except Exception as e:
         return None, None, f"오류: {str(e)}"
 
 
-def add_latlong_columns(api_key):
+async def get_coordinates(client, address, limiter):
+    """
+    주소 하나를 위경도로 변환 (재시도 포함)
+    재시도도 API 호출이므로 시도할 때마다 limiter에서 차례를 받아 초당 요청 수 제한을 지킴
+    """
+    params = {"query": address}
+    
+    for attempt in range(MAX_RETRIES + 1):
+        response = None
+        await limiter.acquire()
+        try:
+            response = await client.get(KAKAO_ADDRESS_URL, params=params)
+        except httpx.TransportError as e:
+            # 타임아웃, 연결 오류 등은 재시도
+            error = f"오류: {str(e)}"
+        except Exception as e:
+            return None, None, f"오류: {str(e)}"
+        else:
+            # 호출 제한(429)과 서버 오류(5xx)만 재시도하고 나머지는 바로 결과 반환
+            if response.status_code != 429 and response.status_code < 500:
+                return _parse_response(response)
+            error = f"HTTP {response.status_code}"
+        
+        if attempt < MAX_RETRIES:
+            await asyncio.sleep(_backoff_delay(attempt, response))
+    
+    return None, None, error
+
+
+async def bound_fetch(sem, limiter, client, address):
+    """동시 요청 수와 초당 요청 수를 제한하면서 좌표 조회"""
+    async with sem:
+        return await get_coordinates(client, address, limiter)
+
+
+def _cache_key(address):
+    """정리된 주소로 캐시 키 생성"""
+    return hashlib.blake2b(address.encode('utf-8'), digest_size=16).hexdigest()
+
+
+async def geocode_addresses(addresses, api_key, cache=None):
+    """
+    주소 목록을 동시에 위경도로 변환
+    캐시에 있는 주소와 중복 주소는 API를 다시 호출하지 않음
+    
+    Args:
+        addresses: 정리된 주소 목록
+        api_key: Kakao REST API 키
+        cache: shelve 캐시 (선택)
+    
+    Returns:
+        [(위도, 경도, 오류), ...] 입력 순서와 동일
+    """
+    now = time.time()
+    results = {}
+    
+    if cache is not None:
+        for address in set(addresses):
+            hit = cache.get(_cache_key(address))
+            if hit is not None and now - hit[3] < CACHE_EXPIRE_SECONDS:
+                results[address] = hit[:3]
+    
+    misses = list(dict.fromkeys(a for a in addresses if a not in results))
+    logger.info("캐시 적중: %d개, API 요청: %d개\n", len(results), len(misses))
+    
+    if misses:
+        sem = asyncio.Semaphore(MAX_CONCURRENCY)
+        limiter = RateLimiter(RATE_LIMIT_PER_SEC)
+        
+        async with create_client(api_key) as client:
+            for start in range(0, len(misses), CHUNK_SIZE):
+                chunk = misses[start:start + CHUNK_SIZE]
+                fetched = await asyncio.gather(*(bound_fetch(sem, limiter, client, a) for a in chunk))
+                
+                for address, result in zip(chunk, fetched):
+                    results[address] = result
+                    # 다시 요청해도 같은 결과인 경우만 캐시 (API 키 오류, 네트워크 오류 등은 제외)
+                    if cache is not None and result[2] in (None, NOT_FOUND_ERROR):
+                        cache[_cache_key(address)] = (*result, now)
+                
+                # 청크마다 캐시를 디스크에 반영해서 중단되어도 이어서 진행 가능
+                if cache is not None:
+                    cache.sync()
+                logger.info("진행: %d/%d", start + len(chunk), len(misses))
+    
+    return [results[a] for a in addresses]
+
+
+def read_excel_cached(path):
+    """
+    엑셀 파일 읽기 (Parquet 캐시 사용)
+    원본 엑셀보다 최신인 캐시가 있으면 느린 엑셀 파싱을 건너뜀
+    """
+    cache_path = os.path.splitext(path)[0] + ".parquet"
+    if os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(path):
+        logger.info("캐시 파일 사용: %s", cache_path)
+        return pd.read_parquet(cache_path)
+    
+    df = pd.read_excel(path)
+    try:
+        df.to_parquet(cache_path, index=False)
+    except Exception as e:
+        logger.warning("Parquet 캐시 저장 실패: %s", e)
+    return df
+
+
+def write_excel_streaming(df, path):
+    """
+    xlsxwriter constant_memory 모드로 엑셀 저장 (행 단위로 바로 디스크에 기록)
+    pandas의 to_excel은 셀을 열 단위로 쓰기 때문에 constant_memory 모드에서는
+    값이 누락되므로 행 순서대로 직접 기록함
+    """
+    workbook = xlsxwriter.Workbook(path, {'constant_memory': True})
+    worksheet = workbook.add_worksheet()
+    worksheet.write_row(0, 0, df.columns.tolist())
+    
+    # NaN은 빈 셀로 기록
+    values = df.astype(object).where(df.notna(), None)
+    for row_idx, row in enumerate(values.itertuples(index=False, name=None), start=1):
+        worksheet.write_row(row_idx, 0, row)
+    
+    workbook.close()
+
+
+def add_latlong_columns(api_key, limit=None):
     current_dir = os.path.dirname(os.path.abspath(__file__))
     input_file = os.path.join(current_dir, "마포구_전체_가게.xlsx")
     output_file = os.path.join(current_dir, "마포구_전체_가게_위경도.xlsx")
+    parquet_file = os.path.join(current_dir, "마포구_전체_가게_위경도.parquet")
+    cache_file = os.path.join(current_dir, ".geocache")
     
     # 파일 읽기
-    print("파일 읽는 중...")
-    df = pd.read_excel(input_file)
-    print(f"총 {len(df)}개 가게")
-    print(f"컬럼: {list(df.columns)}")
-    
-    # 위도/경도 컬럼 추가
-    df['위도'] = None
-    df['경도'] = None
+    logger.info("파일 읽는 중...")
+    df = read_excel_cached(input_file)
+    logger.info("총 %d개 가게", len(df))
+    logger.info("컬럼: %s", list(df.columns))
     
     # 주소 컬럼 찾기 (소재지, 소재지(도로명), 주소 등)
     address_column = None
@@ -73,79 +274,104 @@ def add_latlong_columns(api_key):
             break
     
     if address_column is None:
-        print("주소 컬럼을 찾을 수 없습니다.")
+        logger.error("주소 컬럼을 찾을 수 없습니다.")
         return
     
-    print(f"\n주소 컬럼: {address_column}")
-    print("위도/경도 변환 중...\n")
+    logger.info("\n주소 컬럼: %s", address_column)
+    logger.info("위도/경도 변환 중...\n")
     
-    # 각 주소를 위경도로 변환
     success_count = 0
     fail_count = 0
     error_messages = {}
     
-    for idx, row in df.iterrows():
-        address = row[address_column]
-        
-        if pd.isna(address):
-            fail_count += 1
-            continue
-        
-        # 주소 정리
-        clean_addr = clean_address(address)
-        
-        lat, lon, error = get_coordinates(clean_addr, api_key)
-        
+    # 주소 정리: 괄호와 괄호 안의 내용(건물명, 호수 등) 제거, 연속 공백을 하나로, 앞뒤 공백 제거
+    # (행 단위가 아니라 컬럼 전체를 한 번에 처리)
+    mask = df[address_column].notna()
+    fail_count += int((~mask).sum())
+    df['_clean_addr'] = (
+        df.loc[mask, address_column].astype(str)
+        .str.replace(_PAREN_RE, '', regex=True)
+        .str.replace(_WS_RE, ' ', regex=True)
+        .str.strip()
+    )
+    
+    # 변환할 주소 수집 (행 위치, 원본 주소, 정리된 주소)
+    raw_addrs = df[address_column].to_numpy(dtype=object)
+    clean_addrs = df['_clean_addr'].to_numpy(dtype=object)
+    positions = np.flatnonzero(mask.to_numpy())
+    if limit is not None:
+        logger.info("[테스트 모드] 처음 %d개만 처리합니다.\n", limit)
+        positions = positions[:limit]
+    targets = [(idx, raw_addrs[idx], clean_addrs[idx]) for idx in positions]
+    
+    # 각 주소를 위경도로 변환 (캐시 확인 후 연결 재사용 + 동시 요청)
+    with shelve.open(cache_file) as cache:
+        results = asyncio.run(geocode_addresses([t[2] for t in targets], api_key, cache))
+    
+    # 위도/경도 배열 (float64로 미리 할당, 실패한 행은 NaN)
+    lats = np.full(len(df), np.nan, dtype=np.float64)
+    lons = np.full(len(df), np.nan, dtype=np.float64)
+    
+    for (idx, address, clean_addr), (lat, lon, error) in zip(targets, results):
         if lat and lon:
-            df.at[idx, '위도'] = lat
-            df.at[idx, '경도'] = lon
+            lats[idx] = lat
+            lons[idx] = lon
             success_count += 1
-            print(f"[{idx+1}/{len(df)}] ✓ {clean_addr[:40]}")
         else:
             fail_count += 1
-            print(f"[{idx+1}/{len(df)}] ✗ {clean_addr[:40]} → {error}")
+            logger.debug("[%d/%d] ✗ %s → %s", idx + 1, len(df), clean_addr[:40], error)
             if error not in error_messages:
                 error_messages[error] = 0
             error_messages[error] += 1
             
             # 첫 번째 실패 시 상세 정보 출력
-            if fail_count == 1:
-                print(f"\n[디버깅] 첫 번째 실패 상세:")
-                print(f"  원본 주소: {address}")
-                print(f"  정리된 주소: {clean_addr}")
-                print(f"  오류: {error}")
-        
-        # API 호출 제한 방지 (0.1초 대기)
-        time.sleep(0.1)
-        
-        # 처음 3개만 테스트
-        if idx >= 2:
-            print(f"\n[테스트 모드] 처음 3개만 처리했습니다.")
-            print("전체 처리하려면 73번째 줄의 break를 삭제하세요.")
-            break
+            if sum(error_messages.values()) == 1:
+                logger.warning("[디버깅] 첫 번째 실패 상세:\n"
+                               "  원본 주소: %s\n"
+                               "  정리된 주소: %s\n"
+                               "  오류: %s", address, clean_addr, error)
+    
+    # 위도/경도 컬럼을 한 번에 추가
+    df = df.drop(columns=['_clean_addr'])
+    df['위도'] = lats
+    df['경도'] = lons
     
-    # 결과 저장
-    print(f"\n파일 저장 중: {output_file}")
-    df.to_excel(output_file, index=False)
+    # 결과 저장 (Parquet은 빠른 재사용용, xlsx는 추천 서비스 입력용)
+    logger.info("\n파일 저장 중: %s", parquet_file)
+    df.to_parquet(parquet_file, compression='zstd', index=False)
+    logger.info("파일 저장 중: %s", output_file)
+    write_excel_streaming(df, output_file)
     
-    print("\n완료!")
-    print(f"  성공: {success_count}개")
-    print(f"  실패: {fail_count}개")
+    logger.info("\n완료!")
+    logger.info("  성공: %d개", success_count)
+    logger.info("  실패: %d개", fail_count)
     
     if error_messages:
-        print("\n[오류 유형별 통계]")
+        logger.info("\n[오류 유형별 통계]")
         for error, count in error_messages.items():
-            print(f"  {error}: {count}개")
+            logger.info("  %s: %d개", error, count)
     
-    print(f"\n저장 위치: {output_file}")
+    logger.info("\n저장 위치: %s", output_file)
 
 
-if __name__ == "__main__":
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="가게 주소를 위도/경도로 변환")
+    parser.add_argument("--api-key", help="Kakao REST API 키 (없으면 입력 받음)")
+    parser.add_argument("--limit", type=int, default=None, help="처음 N개 주소만 처리 (테스트용)")
+    args = parser.parse_args(argv)
+    
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    # httpx가 요청마다 남기는 INFO 로그 숨김
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+    
     # Kakao REST API 키 입력
-    api_key = input("API 키 입력: ").strip()
+    api_key = args.api_key or input("API 키 입력: ").strip()
     
     if not api_key:
         print("API 키를 입력해주세요.")
     else:
-        add_latlong_columns(api_key)
+        add_latlong_columns(api_key, limit=args.limit)
 
+
+if __name__ == "__main__":
+    main()
@@ -1,40 +1,80 @@
 """
 FastAPI 메인 애플리케이션
 """
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse, Response
 from app.models.request import RecommendationRequest
 from app.models.response import RecommendationResponse
-from app.services.recommendation import RecommendationService
+from app.services.recommendation import RecommendationService, get_service
 import logging
+import os
+import orjson
 
-# 로깅 설정
+# 로깅 설정 (LOG_LEVEL=DEBUG로 실행하면 추천 과정의 상세 로그까지 출력)
 logging.basicConfig(
-    level=logging.INFO,
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    서버 시작 시 추천 서비스를 생성하고 가게 데이터를 미리 로드
+    (첫 요청이 데이터 로딩 시간을 부담하지 않도록)
+    """
+    get_service().warm_up()
+    yield
+
+
 # FastAPI 앱 생성
 app = FastAPI(
     title="Stamp AI - 가게 추천 시스템",
     description="스탬프 앱을 위한 AI 기반 가게 추천 API",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse,  # orjson으로 응답 직렬화
+    lifespan=lifespan
 )
 
 # CORS 설정 (스프링 백엔드와 통신을 위해)
+# 운영 환경에서는 CORS_ALLOW_ORIGINS에 허용할 도메인을 콤마로 구분해서 지정
+# 인증 정보(쿠키 등)는 도메인을 명시했을 때만 허용 ("*"와 함께 허용하면 모든 Origin에 인증 정보가 열림)
+_cors_origins = [o.strip() for o in os.getenv("CORS_ALLOW_ORIGINS", "*").split(",") if o.strip()]
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # 실제 운영 환경에서는 특정 도메인으로 제한
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_origins=_cors_origins,
+    allow_credentials="*" not in _cors_origins,
+    allow_methods=["GET", "POST"],
+    allow_headers=["Content-Type", "Authorization"],
+    max_age=86400,  # 브라우저가 preflight 결과를 하루 동안 캐시
 )
 
-# 추천 서비스 인스턴스
-recommendation_service = RecommendationService()
+# 500바이트 이상 응답은 gzip 압축 (추천 결과 JSON 전송량 감소)
+app.add_middleware(GZipMiddleware, minimum_size=500)
+
+# 고정 응답은 미리 직렬화해두고 짧게 캐시하도록 헤더 지정
+_STATIC_CACHE_HEADERS = {"Cache-Control": "public, max-age=5"}
+_ROOT_BODY = orjson.dumps({
+    "message": "Stamp AI - 가게 추천 시스템 API",
+    "version": "1.0.0",
+    "docs": "/docs"
+})
+_HEALTH_BODY = orjson.dumps({
+    "status": "healthy",
+    "service": "stamp-ai"
+})
+
+
+def get_recommendation_service() -> RecommendationService:
+    """프로세스 전체에서 공유하는 추천 서비스 인스턴스 반환"""
+    return get_service()
 
 
 @app.get("/")
@@ -42,11 +82,7 @@ async def root():
     """
     루트 엔드포인트
     """
-    return {
-        "message": "Stamp AI - 가게 추천 시스템 API",
-        "version": "1.0.0",
-        "docs": "/docs"
-    }
+    return Response(content=_ROOT_BODY, media_type="application/json", headers=_STATIC_CACHE_HEADERS)
 
 
 @app.get("/health")
@@ -54,28 +90,30 @@ async def health_check():
     """
     헬스 체크 엔드포인트
     """
-    return {
-        "status": "healthy",
-        "service": "stamp-ai"
-    }
+    return Response(content=_HEALTH_BODY, media_type="application/json", headers=_STATIC_CACHE_HEADERS)
 
 
 @app.post("/api/v1/recommendations", response_model=RecommendationResponse)
-async def get_recommendations(request: RecommendationRequest):
+async def get_recommendations(
+    request: RecommendationRequest,
+    recommendation_service: RecommendationService = Depends(get_recommendation_service)
+):
     try:
-        logger.info(f"추천 요청 수신: user_id={request.user_id}, "
-                   f"location=({request.location.latitude}, {request.location.longitude})")
+        logger.info("추천 요청 수신: user_id=%s, location=(%s, %s)",
+                    request.user_id, request.location.latitude, request.location.longitude)
         
         # 추천 서비스 호출 (DB에서 필요한 데이터를 자동으로 조회)
-        response = recommendation_service.recommend_stores(request)
+        # 동기 연산이므로 스레드풀에서 실행해서 이벤트 루프를 막지 않도록 함
+        response = await run_in_threadpool(recommendation_service.recommend_stores, request)
         
-        total_stores = sum(len(cat.stores) for cat in response.recommendations)
-        logger.info(f"추천 완료: 총 {total_stores}개 가게 반환")
+        if logger.isEnabledFor(logging.INFO):
+            total_stores = sum(len(cat.stores) for cat in response.recommendations)
+            logger.info("추천 완료: 총 %d개 가게 반환", total_stores)
         
         return response
     
     except Exception as e:
-        logger.error(f"추천 중 오류 발생: {str(e)}", exc_info=True)
+        logger.error("추천 중 오류 발생: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=f"서버 오류: {str(e)}")
 
 
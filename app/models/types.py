@@ -0,0 +1,41 @@
+"""
+요청 모델에서 공통으로 사용하는 필드 타입
+"""
+from datetime import datetime
+from typing import Annotated, Optional
+from pydantic import AfterValidator, BeforeValidator
+
+
+def _to_str(v):
+    """숫자로 들어온 ID를 문자열로 변환"""
+    if v is None:
+        return None
+    return str(v)
+
+
+def _date_to_datetime_str(v):
+    """
+    "2025-11-05" 형식을 "2025-11-05T00:00:00"으로 변환
+    (날짜 파싱 자체는 Pydantic에 맡김)
+    """
+    if isinstance(v, str) and len(v) == 10:
+        return v + 'T00:00:00'
+    return v
+
+
+def _to_naive_local(v: datetime) -> datetime:
+    """
+    시간대가 붙은 값("2025-11-05T09:00:00+09:00" 등)은 서버 시간대 기준 naive datetime으로 변환
+    (datetime.now()와 바로 빼서 경과일을 계산할 수 있도록)
+    """
+    if v.tzinfo is not None:
+        return v.astimezone().replace(tzinfo=None)
+    return v
+
+
+# 문자열 또는 숫자로 들어오는 ID (문자열로 통일)
+StrId = Annotated[str, BeforeValidator(_to_str)]
+OptionalStrId = Annotated[Optional[str], BeforeValidator(_to_str)]
+
+# 날짜만 있는 문자열도 허용하는 datetime (시간대가 있으면 naive로 통일)
+DateOrDateTime = Annotated[datetime, BeforeValidator(_date_to_datetime_str), AfterValidator(_to_naive_local)]
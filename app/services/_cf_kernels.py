@@ -0,0 +1,73 @@
+"""
+협업 필터링 유사도 계산 커널
+
+numba가 설치되어 있으면 JIT 컴파일된 병렬 커널을 사용하고,
+없으면 같은 계산을 NumPy 행렬 곱으로 처리
+"""
+import numpy as np
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+
+if njit is not None:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _cosine_sim_matrix_numba(A, B):
+        n, d = A.shape
+        m = B.shape[0]
+
+        # 각 행의 L2 norm을 한 번만 계산
+        a_norm = np.empty(n)
+        for i in prange(n):
+            s = 0.0
+            for k in range(d):
+                s += A[i, k] * A[i, k]
+            a_norm[i] = np.sqrt(s)
+
+        b_norm = np.empty(m)
+        for j in prange(m):
+            s = 0.0
+            for k in range(d):
+                s += B[j, k] * B[j, k]
+            b_norm[j] = np.sqrt(s)
+
+        # 방문 기록이 없는 사용자(norm 0)와의 유사도는 0
+        out = np.zeros((n, m))
+        for i in prange(n):
+            if a_norm[i] == 0.0:
+                continue
+            for j in range(m):
+                if b_norm[j] == 0.0:
+                    continue
+                dot = 0.0
+                for k in range(d):
+                    dot += A[i, k] * B[j, k]
+                out[i, j] = dot / (a_norm[i] * b_norm[j])
+        return out
+
+
+def _normalize_rows(X: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(X, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return X / norms
+
+
+def cosine_sim_matrix(A: np.ndarray, B: np.ndarray) -> np.ndarray:
+    """
+    두 행렬의 행 벡터 간 코사인 유사도 행렬 계산
+
+    Args:
+        A: (n, d) 밀집 행렬
+        B: (m, d) 밀집 행렬
+
+    Returns:
+        (n, m) 유사도 행렬 (float64)
+    """
+    # 입력은 float32로 받아서 float64 복사본을 만들지 않음 (numba 커널은 합을 float64로 누적)
+    A = np.ascontiguousarray(A, dtype=np.float32)
+    B = np.ascontiguousarray(B, dtype=np.float32)
+    if njit is not None:
+        return _cosine_sim_matrix_numba(A, B)
+    return (_normalize_rows(A) @ _normalize_rows(B).T).astype(np.float64)
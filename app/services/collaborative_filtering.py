@@ -4,13 +4,35 @@
 User-based Collaborative Filtering:
 - 비슷한 취향의 사용자들이 방문한 가게를 추천
 - KNN 알고리즘으로 유사 사용자 찾기
-- Cosine Similarity로 유사도 계산
+- Cosine Similarity로 유사도 계산 (L2 정규화된 벡터의 내적)
 """
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional, Union
+from collections import OrderedDict
+import logging
 import numpy as np
 import pandas as pd
-from sklearn.neighbors import NearestNeighbors
-from sklearn.metrics.pairwise import cosine_similarity
+from scipy.sparse import csr_matrix
+from sklearn.preprocessing import normalize
+from app.utils.calculator import top_k_indices
+from app.services._cf_kernels import cosine_sim_matrix
+
+# SimSIMD가 설치되어 있으면 SIMD(AVX-512/NEON) 커널로 코사인 거리 계산
+try:
+    import simsimd
+except ImportError:
+    simsimd = None
+
+logger = logging.getLogger(__name__)
+
+# 사용자 수가 이 이하이면 훈련 시 전체 사용자 간 유사도 행렬을 미리 계산
+# (n^2 크기이므로 사용자가 많을 때는 요청 시 해당 사용자 행만 계산)
+SIM_MATRIX_MAX_USERS = 1000
+
+# 방문 행렬의 밀도(0이 아닌 칸 비율)가 이 이상이면 희소 행렬 대신 float32 밀집 행렬 곱(BLAS) 사용
+DENSE_GEMV_MIN_DENSITY = 0.2
+
+# 유사 사용자 조회 결과를 보관할 최대 개수 (오래 안 쓴 것부터 제거)
+SIMILAR_USERS_CACHE_SIZE = 10_000
 
 
 class CollaborativeFilteringModel:
@@ -21,63 +43,108 @@ class CollaborativeFilteringModel:
         self.user_item_matrix = None
         self.user_ids = []
         self.store_ids = []
-        self.model = None
+        self.user_norm = None
+        self.dense_users = None
+        self.user_norms = None
+        self.dense_user_norm = None
+        self.user_sim_matrix = None
+        self.store_popularity = None
+        self.user_id_to_idx = {}
+        self.n_neighbors = 10
         self.is_trained = False
+        # 재훈련 전까지 같은 사용자의 유사 사용자 계산 결과를 재사용 {(사용자 행, 이웃 수): (행 인덱스, 유사도)}
+        self._sim_cache: OrderedDict = OrderedDict()
         
-    def create_user_item_matrix(self, visit_data: List[Dict]) -> pd.DataFrame:
+    def create_user_item_matrix(self, visit_data: Union[List[Dict], pd.DataFrame]) -> Optional[csr_matrix]:
         """
-        사용자-가게 방문 행렬 생성
+        사용자-가게 방문 행렬 생성 (희소 행렬)
         
         Args:
             visit_data: [{"user_id": "user1", "store_id": "store0001", "visit_count": 5}, ...]
+                        또는 같은 컬럼의 DataFrame (dict 리스트로 바꾸지 않고 그대로 사용)
             
         Returns:
-            user_item_matrix: 행=사용자, 열=가게, 값=방문횟수
+            user_item_matrix: 행=사용자, 열=가게, 값=방문횟수 (CSR), 데이터가 없으면 None
         """
-        if not visit_data:
-            return pd.DataFrame()
-        
-        # DataFrame으로 변환
-        df = pd.DataFrame(visit_data)
-        
-        # Pivot table 생성 (사용자 x 가게)
-        user_item_matrix = df.pivot_table(
-            index='user_id',
-            columns='store_id',
-            values='visit_count',
-            fill_value=0
+        if visit_data is None or len(visit_data) == 0:
+            return None
+        
+        # DataFrame으로 변환 (이미 DataFrame이면 그대로 사용)
+        df = visit_data if isinstance(visit_data, pd.DataFrame) else pd.DataFrame(visit_data)
+        
+        # 같은 사용자-가게 기록이 여러 개면 기존 pivot table(aggfunc 기본값 mean)처럼 평균 사용
+        visits = df.groupby(['user_id', 'store_id'], sort=True)['visit_count'].mean().dropna()
+        if visits.empty:
+            return None
+        
+        # 사용자/가게 ID를 정수 인덱스로 변환 (정렬해서 기존 pivot table과 같은 순서 유지)
+        user_idx, user_uniques = pd.factorize(visits.index.get_level_values('user_id'), sort=True)
+        store_idx, store_uniques = pd.factorize(visits.index.get_level_values('store_id'), sort=True)
+        
+        # CSR 행렬 생성 (사용자 x 가게)
+        user_item_matrix = csr_matrix(
+            (visits.to_numpy(dtype=np.float64), (user_idx, store_idx)),
+            shape=(len(user_uniques), len(store_uniques))
         )
         
-        self.user_ids = user_item_matrix.index.tolist()
-        self.store_ids = user_item_matrix.columns.tolist()
+        self.user_ids = user_uniques.tolist()
+        self.store_ids = store_uniques.tolist()
         
         return user_item_matrix
     
-    def train(self, visit_data: List[Dict], n_neighbors: int = 10):
+    def train(self, visit_data: Union[List[Dict], pd.DataFrame], n_neighbors: int = 10):
         """
         협업 필터링 모델 훈련
         
         Args:
-            visit_data: 사용자-가게 방문 기록
+            visit_data: 사용자-가게 방문 기록 (dict 리스트 또는 DataFrame)
             n_neighbors: 유사 사용자 수 (기본 10명)
         """
         # 1. 사용자-가게 행렬 생성
         self.user_item_matrix = self.create_user_item_matrix(visit_data)
+        self.store_popularity = None
+        self._sim_cache.clear()
         
-        if self.user_item_matrix.empty:
-            print("방문 데이터가 없어서 모델을 훈련할 수 없습니다.")
+        if self.user_item_matrix is None:
+            logger.debug("방문 데이터가 없어서 모델을 훈련할 수 없습니다.")
             return
         
-        # 2. KNN 모델 훈련 (Cosine Similarity 사용)
-        self.model = NearestNeighbors(
-            n_neighbors=min(n_neighbors, len(self.user_ids)),
-            metric='cosine',
-            algorithm='brute'
-        )
-        self.model.fit(self.user_item_matrix.values)
+        self.user_norm = None
+        self.dense_users = None
+        self.user_norms = None
+        self.dense_user_norm = None
+        
+        # 2. 사용자 간 코사인 유사도를 계산할 수 있도록 준비
+        # 사용자 수가 적으면 유사도 행렬을 미리 계산해서 조회 시 행만 꺼내 쓰도록 함
+        # (방문 횟수는 float32로 정확히 표현되므로 밀집 행렬도 float32로 만들어 메모리를 절반으로 줄임)
+        if len(self.user_ids) <= SIM_MATRIX_MAX_USERS:
+            dense = self.user_item_matrix.astype(np.float32).toarray()
+            self.user_sim_matrix = cosine_sim_matrix(dense, dense)
+        else:
+            self.user_sim_matrix = None
+            if simsimd is not None:
+                # SimSIMD용 밀집 행렬은 int8로 저장 (127회 초과 방문은 127로 포화)
+                # 코사인 유사도는 크기에 무관하므로 메모리를 1/8로 줄여도 순위는 거의 같음
+                # (희소 행렬 상태에서 포화/변환한 뒤 펼쳐서 float64 밀집 행렬을 거치지 않음)
+                self.dense_users = self.user_item_matrix.minimum(127).astype(np.int8).toarray()
+                self.user_norms = np.linalg.norm(self.dense_users, axis=1)
+            else:
+                # 사용자 벡터를 L2 정규화 (Cosine Similarity = 정규화된 벡터의 내적)
+                # 유사도 조회용이므로 float32로 저장해 희소/밀집 행렬 곱의 메모리 대역폭을 절반으로 줄임
+                user_norm = normalize(self.user_item_matrix.astype(np.float32), norm='l2', axis=1)
+                if self.user_item_matrix.nnz / (len(self.user_ids) * len(self.store_ids)) >= DENSE_GEMV_MIN_DENSITY:
+                    # 방문 행렬이 충분히 밀집되어 있으면 밀집 행렬로 저장해 BLAS 행렬-벡터 곱 사용
+                    self.dense_user_norm = user_norm.toarray()
+                else:
+                    self.user_norm = user_norm
+        self.user_id_to_idx = {uid: i for i, uid in enumerate(self.user_ids)}
+        self.n_neighbors = n_neighbors
+        
+        # 가게별 총 방문 횟수 (신규 사용자 추천용, 다음 훈련 전까지 바뀌지 않음)
+        self.store_popularity = np.asarray(self.user_item_matrix.sum(axis=0)).ravel()
         
         self.is_trained = True
-        print(f"협업 필터링 모델 훈련 완료: {len(self.user_ids)}명 사용자, {len(self.store_ids)}개 가게")
+        logger.debug("협업 필터링 모델 훈련 완료: %d명 사용자, %d개 가게", len(self.user_ids), len(self.store_ids))
     
     def get_similar_users(self, user_id: str, n_neighbors: int = 5) -> List[Tuple[str, float]]:
         """
@@ -90,7 +157,7 @@ class CollaborativeFilteringModel:
         Returns:
             [(user_id, similarity_score), ...] 유사도 높은 순
         """
-        if not self.is_trained or user_id not in self.user_ids:
+        if not self.is_trained or user_id not in self.user_id_to_idx:
             return []
         
         # 사용자가 1명뿐이면 유사 사용자를 찾을 수 없음
@@ -98,25 +165,62 @@ class CollaborativeFilteringModel:
             return []
         
         # 사용자 인덱스 찾기
-        user_idx = self.user_ids.index(user_id)
-        user_vector = self.user_item_matrix.iloc[user_idx].values.reshape(1, -1)
+        user_idx = self.user_id_to_idx[user_id]
+        neighbor_indices, similarities = self._find_neighbors(user_idx, n_neighbors)
         
-        # n_neighbors가 전체 사용자 수를 초과하지 않도록 조정
-        # 자기 자신을 제외하므로 +1
-        actual_n_neighbors = min(n_neighbors + 1, len(self.user_ids))
-        
-        # 유사 사용자 찾기
-        distances, indices = self.model.kneighbors(user_vector, n_neighbors=actual_n_neighbors)
-        
-        # 자기 자신 제외
         similar_users = []
-        for idx, distance in zip(indices[0][1:], distances[0][1:]):
-            similar_user_id = self.user_ids[idx]
-            similarity = 1 - distance  # Cosine distance -> similarity
-            similar_users.append((similar_user_id, similarity))
+        for idx, similarity in zip(neighbor_indices, similarities):
+            similar_users.append((self.user_ids[idx], float(similarity)))
         
         return similar_users
     
+    def _find_neighbors(self, user_idx: int, n_neighbors: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        유사 사용자의 행 인덱스와 유사도 배열 반환 (유사도 높은 순, 자기 자신 제외)
+        같은 모델로 다시 요청되면 캐시한 결과를 반환 (train()이 캐시를 비움)
+        """
+        cache_key = (user_idx, n_neighbors)
+        cached = self._sim_cache.get(cache_key)
+        if cached is not None:
+            self._sim_cache.move_to_end(cache_key)
+            return cached
+        
+        if self.user_sim_matrix is not None:
+            # 훈련 시 계산해 둔 유사도 행렬의 행 사용
+            similarities = self.user_sim_matrix[user_idx].copy()
+        elif self.dense_users is not None:
+            # SimSIMD로 전체 사용자와의 코사인 거리 계산
+            distances = simsimd.cdist(self.dense_users[user_idx:user_idx + 1], self.dense_users, metric='cosine')
+            similarities = 1.0 - np.asarray(distances, dtype=np.float64).ravel()
+            # SimSIMD는 0 벡터끼리의 거리를 0으로 반환하므로 방문 기록이 없는 사용자는 유사도 0으로 처리
+            if self.user_norms[user_idx] == 0:
+                similarities[:] = 0.0
+            else:
+                similarities[self.user_norms == 0] = 0.0
+        elif self.dense_user_norm is not None:
+            # 정규화된 밀집 행렬과 해당 사용자 벡터의 곱 (sgemv 한 번)
+            similarities = (self.dense_user_norm @ self.dense_user_norm[user_idx]).astype(np.float64)
+        else:
+            # 전체 사용자와의 유사도를 희소 행렬 곱 한 번으로 계산
+            similarities = (self.user_norm @ self.user_norm[user_idx].T).toarray().ravel().astype(np.float64)
+        similarities[user_idx] = -np.inf  # 자기 자신 제외
+        
+        # n_neighbors가 자기 자신을 제외한 사용자 수를 초과하지 않도록 조정
+        actual_n_neighbors = min(n_neighbors, len(self.user_ids) - 1)
+        
+        # 상위 n명만 골라서 유사도 높은 순으로 정렬
+        top_indices = top_k_indices(similarities, actual_n_neighbors)
+        result = (top_indices, similarities[top_indices])
+        
+        # 캐시한 배열을 호출한 쪽에서 바꾸지 못하도록 읽기 전용으로 고정
+        for array in result:
+            array.flags.writeable = False
+        self._sim_cache[cache_key] = result
+        if len(self._sim_cache) > SIMILAR_USERS_CACHE_SIZE:
+            self._sim_cache.popitem(last=False)
+        
+        return result
+    
     def recommend_stores(
         self, 
         user_id: str, 
@@ -139,44 +243,37 @@ class CollaborativeFilteringModel:
         
         # 사용자가 너무 적으면 협업 필터링 불가능 (최소 2명 필요)
         if len(self.user_ids) < 2:
-            print(f"사용자가 {len(self.user_ids)}명뿐이라 협업 필터링이 불가능합니다. 인기 기반 추천으로 대체합니다.")
+            logger.debug("사용자가 %d명뿐이라 협업 필터링이 불가능합니다. 인기 기반 추천으로 대체합니다.", len(self.user_ids))
             return self._recommend_for_new_user(n_recommendations)
         
         # 신규 사용자 처리
-        if user_id not in self.user_ids:
+        if user_id not in self.user_id_to_idx:
             return self._recommend_for_new_user(n_recommendations)
         
         # 1. 유사 사용자 찾기
-        similar_users = self.get_similar_users(user_id, n_neighbors=10)
+        user_idx = self.user_id_to_idx[user_id]
+        neighbor_indices, similarities = self._find_neighbors(user_idx, self.n_neighbors)
         
-        if not similar_users:
-            print(f"유사한 사용자를 찾을 수 없습니다. 인기 기반 추천으로 대체합니다.")
+        if len(neighbor_indices) == 0:
+            logger.debug("유사한 사용자를 찾을 수 없습니다. 인기 기반 추천으로 대체합니다.")
             return self._recommend_for_new_user(n_recommendations)
         
-        # 2. 유사 사용자들의 방문 가게를 가중 평균
-        user_idx = self.user_ids.index(user_id)
-        user_visited = self.user_item_matrix.iloc[user_idx]
-        
-        # 예측 점수 계산
-        predicted_scores = np.zeros(len(self.store_ids))
-        total_similarity = 0.0
-        
-        for similar_user_id, similarity in similar_users:
-            similar_user_idx = self.user_ids.index(similar_user_id)
-            similar_user_visits = self.user_item_matrix.iloc[similar_user_idx].values
-            predicted_scores += similarity * similar_user_visits
-            total_similarity += similarity
+        # 2. 유사 사용자들의 방문 횟수를 유사도로 가중 평균 (희소 행렬-벡터 곱 한 번)
+        predicted_scores = self.user_item_matrix[neighbor_indices].T @ similarities
+        total_similarity = similarities.sum()
         
         if total_similarity > 0:
             predicted_scores /= total_similarity
         
         # 3. 이미 방문한 가게 제외
+        # (CSR 행의 열 인덱스가 곧 방문한 가게 위치이므로 전체 길이 마스크를 만들지 않음)
         if exclude_visited:
-            visited_mask = user_visited.values > 0
-            predicted_scores[visited_mask] = -1
+            start, end = self.user_item_matrix.indptr[user_idx:user_idx + 2]
+            visited = self.user_item_matrix.indices[start:end][self.user_item_matrix.data[start:end] > 0]
+            predicted_scores[visited] = -np.inf
         
-        # 4. 상위 N개 추천
-        top_indices = np.argsort(predicted_scores)[::-1][:n_recommendations]
+        # 4. 상위 N개 추천 (전체 정렬 없이 상위 N개만 선택)
+        top_indices = top_k_indices(predicted_scores, n_recommendations)
         
         recommendations = []
         for idx in top_indices:
@@ -198,19 +295,20 @@ class CollaborativeFilteringModel:
         Returns:
             [(store_id, popularity_score), ...] 인기 순
         """
-        if self.user_item_matrix is None or self.user_item_matrix.empty:
+        if self.store_popularity is None:
             return []
         
-        # 각 가게의 총 방문 횟수 계산
-        store_popularity = self.user_item_matrix.sum(axis=0)
+        # 훈련 시 계산해 둔 가게별 총 방문 횟수 사용
+        store_popularity = self.store_popularity
         
-        # 상위 N개 추천
-        top_stores = store_popularity.nlargest(n_recommendations)
+        # 상위 N개 추천 (Series 생성/전체 정렬 없이 상위 N개만 선택)
+        top_indices = top_k_indices(store_popularity, n_recommendations)
         
         recommendations = []
-        for store_id, score in top_stores.items():
+        for idx in top_indices:
+            score = store_popularity[idx]
             if score > 0:
-                recommendations.append((store_id, float(score)))
+                recommendations.append((self.store_ids[idx], float(score)))
         
         return recommendations
     
@@ -224,14 +322,14 @@ class CollaborativeFilteringModel:
         
         # 희소성(sparsity) 계산
         total_cells = len(self.user_ids) * len(self.store_ids)
-        non_zero_cells = (self.user_item_matrix.values > 0).sum()
+        non_zero_cells = int((self.user_item_matrix.data > 0).sum())
         sparsity = 1 - (non_zero_cells / total_cells)
         
         return {
             "is_trained": True,
             "n_users": len(self.user_ids),
             "n_stores": len(self.store_ids),
-            "total_visits": int(self.user_item_matrix.sum().sum()),
+            "total_visits": int(self.user_item_matrix.sum()),
             "sparsity": f"{sparsity * 100:.2f}%",
             "avg_visits_per_user": float(self.user_item_matrix.sum(axis=1).mean())
         }
@@ -1,29 +1,201 @@
 """
 카테고리별 가게 추천 로직 서비스
 """
-from typing import List, Dict
+from typing import List, Dict, Iterable, Tuple
 from datetime import datetime, timedelta
-from app.models.request import RecommendationRequest
-from app.models.response import StoreInfo, StoreEvent, EventType, CategoryRecommendation, RecommendationResponse, SimpleStoreInfo
-from app.utils.calculator import haversine_distance
+from app.models.request import (
+    RecommendationRequest, EVENT_STORE_LIST, NEW_STORE_LIST, POPULAR_STORE_LIST, VISIT_DATA_LIST
+)
+from app.models.response import CategoryRecommendation, RecommendationResponse, SimpleStoreInfo
+from app.utils.calculator import haversine_distances_rad, top_k_indices
 from app.services.collaborative_filtering import CollaborativeFilteringModel
 import pandas as pd
+import numpy as np
+from sklearn.neighbors import BallTree
+import math
 import os
+import tempfile
+import threading
+import time
+import logging
 import pymysql
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
 from app.config import get_database_url
 
+# connectorx가 설치되어 있으면 MySQL 결과를 DBAPI 커서 대신 Arrow 컬럼 버퍼로 바로 읽음
+try:
+    import connectorx
+except ImportError:
+    connectorx = None
+
+logger = logging.getLogger(__name__)
+
+# 같은 방문 데이터로 훈련한 협업 필터링 모델을 재사용하는 시간 (초)
+CACHE_TTL_SECONDS = float(os.getenv("RECOMMENDATION_CACHE_TTL", "300"))
+
+# 가게 데이터 Parquet 캐시의 전처리 버전 (_load_stores_from_excel의 전처리를 바꾸면 올려서 기존 캐시를 무효화)
+STORE_CACHE_VERSION = 1
+
+# 전체 방문 데이터를 서버 측 커서로 나눠 읽을 때 한 번에 가져오는 행 수
+VISIT_FETCH_CHUNK_SIZE = 50_000
+
+# 조회 쿼리는 import 시 한 번만 text()로 만들어 재사용 (값은 문자열로 끼워 넣지 않고 바인드 파라미터로 전달)
+# orders와 stores를 조인하는 쿼리는 stores 기본키 컬럼 이름(store_id 또는 id)별로 준비
+_Q_EVENT_STORES = text("""
+    SELECT 
+        address as store_address,
+        COALESCE(exp_multiplier, 1.0) as exp_multiplier
+    FROM stores
+    WHERE exp_multiplier > 1.0
+      AND address IS NOT NULL 
+      AND address != ''
+    ORDER BY exp_multiplier DESC
+    LIMIT 20
+""")
+
+_Q_NEW_STORES = text("""
+    SELECT 
+        address as store_address,
+        joined_date
+    FROM stores
+    WHERE joined_date >= DATE_SUB(NOW(), INTERVAL 30 DAY)
+      AND address IS NOT NULL 
+      AND address != ''
+    ORDER BY joined_date DESC
+    LIMIT 20
+""")
+
+_Q_STORE_PK_COLUMNS = text("""
+    SELECT column_name AS column_name
+    FROM information_schema.columns
+    WHERE table_schema = DATABASE()
+      AND table_name = 'stores'
+      AND column_name IN ('store_id', 'id')
+""")
+
+_Q_POPULAR_STORES = {
+    'store_id': text("""
+        SELECT 
+            s.address as store_address,
+            COUNT(o.order_id) as visit_count
+        FROM orders o
+        INNER JOIN stores s ON o.store_id = s.store_id
+        WHERE s.address IS NOT NULL 
+          AND s.address != ''
+        GROUP BY s.address
+        HAVING visit_count > 0
+        ORDER BY visit_count DESC
+        LIMIT 20
+    """),
+    'id': text("""
+        SELECT 
+            s.address as store_address,
+            COUNT(o.order_id) as visit_count
+        FROM orders o
+        INNER JOIN stores s ON o.store_id = s.id
+        WHERE s.address IS NOT NULL 
+          AND s.address != ''
+        GROUP BY s.address
+        HAVING visit_count > 0
+        ORDER BY visit_count DESC
+        LIMIT 20
+    """)
+}
+
+_Q_USER_VISITS = {
+    'store_id': text("""
+        SELECT 
+            o.user_id,
+            s.address as store_address,
+            COUNT(o.order_id) as visit_count
+        FROM orders o
+        INNER JOIN stores s ON o.store_id = s.store_id
+        WHERE o.user_id = :user_id
+          AND s.address IS NOT NULL 
+          AND s.address != ''
+        GROUP BY o.user_id, s.address
+        HAVING visit_count > 0
+        ORDER BY visit_count DESC
+    """),
+    'id': text("""
+        SELECT 
+            o.user_id,
+            s.address as store_address,
+            COUNT(o.order_id) as visit_count
+        FROM orders o
+        INNER JOIN stores s ON o.store_id = s.id
+        WHERE o.user_id = :user_id
+          AND s.address IS NOT NULL 
+          AND s.address != ''
+        GROUP BY o.user_id, s.address
+        HAVING visit_count > 0
+        ORDER BY visit_count DESC
+    """)
+}
+
+_Q_ALL_VISITS = {
+    'store_id': text("""
+        SELECT 
+            o.user_id,
+            s.address as store_address,
+            COUNT(o.order_id) as visit_count
+        FROM orders o
+        INNER JOIN stores s ON o.store_id = s.store_id
+        WHERE s.address IS NOT NULL 
+          AND s.address != ''
+        GROUP BY o.user_id, s.address
+        HAVING visit_count > 0
+        ORDER BY o.user_id, visit_count DESC
+    """),
+    'id': text("""
+        SELECT 
+            o.user_id,
+            s.address as store_address,
+            COUNT(o.order_id) as visit_count
+        FROM orders o
+        INNER JOIN stores s ON o.store_id = s.id
+        WHERE s.address IS NOT NULL 
+          AND s.address != ''
+        GROUP BY o.user_id, s.address
+        HAVING visit_count > 0
+        ORDER BY o.user_id, visit_count DESC
+    """)
+}
+
 
 class RecommendationService:
     """가게 추천 서비스"""
     
     def __init__(self):
-        """초기화 - lazy loading (첫 요청 시 데이터 로드)"""
+        """초기화 - 가게 데이터를 바로 로드 (Parquet 캐시가 있으면 엑셀 파싱 생략)"""
         self.stores_df = None
-        self._is_loading = False
         self.cf_model = CollaborativeFilteringModel()
+        # 요청마다 cf_model을 다시 훈련하므로 동시 요청 간 훈련/추천이 섞이지 않도록 보호
+        self._cf_lock = threading.Lock()
+        # 마지막으로 훈련한 방문 데이터의 지문과 훈련 시각 (같은 데이터면 TTL 동안 재훈련 생략)
+        self._cf_fingerprint = None
+        self._cf_trained_at = 0.0
         self.db_engine = None  # SQLAlchemy 엔진
-        print("RecommendationService 초기화 완료")
+        self._store_pk = None  # stores 테이블 조인 컬럼 (처음 조회할 때 스키마에서 확인)
+        self._ensure_data_loaded()
+        logger.info("RecommendationService 초기화 완료")
+    
+    def warm_up(self):
+        """
+        서버 시작 시 가게 데이터를 미리 로드하고 요청 경로의 계산을 한 번씩 실행
+        (numba 유사도 커널 JIT 컴파일 등을 첫 요청이 부담하지 않도록)
+        """
+        self._ensure_data_loaded()
+        # 공간 인덱스 조회 + 벡터 거리 계산
+        self.recommend_nearby_stores(37.5665, 126.9780, set())
+        # 협업 필터링 훈련/추천 (서비스 모델의 상태는 건드리지 않도록 임시 모델 사용)
+        model = CollaborativeFilteringModel()
+        model.train([
+            {"user_id": "warm_up_1", "store_id": "store0001", "visit_count": 1},
+            {"user_id": "warm_up_2", "store_id": "store0001", "visit_count": 1},
+        ])
+        model.recommend_stores("warm_up_1")
     
     def _fetch_event_stores_from_db(self) -> List[Dict]:
         """
@@ -33,75 +205,55 @@ class RecommendationService:
         """
         engine = self._get_db_engine()
         if engine is None:
-            print("DB 연결 실패로 이벤트 가게를 조회할 수 없습니다.")
+            logger.warning("DB 연결 실패로 이벤트 가게를 조회할 수 없습니다.")
             return []
         
         try:
             # exp_multiplier가 1보다 큰 가게들 조회 (이벤트 참여 중)
             # stores 테이블에 exp_multiplier 컬럼이 있다고 가정
-            query = """
-                SELECT 
-                    address as store_address,
-                    COALESCE(exp_multiplier, 1.0) as exp_multiplier
-                FROM stores
-                WHERE exp_multiplier > 1.0
-                  AND address IS NOT NULL 
-                  AND address != ''
-                ORDER BY exp_multiplier DESC
-                LIMIT 20
-            """
-            
-            df = pd.read_sql(query, engine)
+            df = self._read_sql(_Q_EVENT_STORES, engine)
             
             if df.empty:
-                print("이벤트 참여 가게가 없습니다.")
+                logger.debug("이벤트 참여 가게가 없습니다.")
                 return []
             
             result = df.to_dict('records')
-            print(f"DB에서 이벤트 가게 {len(result)}개 조회 완료")
+            logger.debug("DB에서 이벤트 가게 %d개 조회 완료", len(result))
             return result
             
         except Exception as e:
-            print(f"이벤트 가게 조회 실패: {e}")
+            logger.warning("이벤트 가게 조회 실패: %s", e)
             return []
     
     def _fetch_new_stores_from_db(self) -> List[Dict]:
         """
         DB에서 신규 가입 가게 조회 (최근 30일 이내)
         Returns:
-            [{"store_address": "주소", "joined_date": datetime}, ...]
+            [{"store_address": "주소", "joined_date": datetime, "days_since_joined": 3}, ...]
         """
         engine = self._get_db_engine()
         if engine is None:
-            print("DB 연결 실패로 신규 가게를 조회할 수 없습니다.")
+            logger.warning("DB 연결 실패로 신규 가게를 조회할 수 없습니다.")
             return []
         
         try:
             # 최근 30일 이내 가입한 가게들 조회
-            query = """
-                SELECT 
-                    address as store_address,
-                    joined_date
-                FROM stores
-                WHERE joined_date >= DATE_SUB(NOW(), INTERVAL 30 DAY)
-                  AND address IS NOT NULL 
-                  AND address != ''
-                ORDER BY joined_date DESC
-                LIMIT 20
-            """
-            
-            df = pd.read_sql(query, engine)
+            df = self._read_sql(_Q_NEW_STORES, engine)
             
             if df.empty:
-                print("신규 가입 가게가 없습니다.")
+                logger.debug("신규 가입 가게가 없습니다.")
                 return []
             
+            # 가입일 파싱과 가입 후 경과일 계산을 행마다 하지 않고 컬럼 단위로 한 번에 처리
+            df['joined_date'] = pd.to_datetime(df['joined_date'])
+            df['days_since_joined'] = (pd.Timestamp.now() - df['joined_date']).dt.days
+            
             result = df.to_dict('records')
-            print(f"DB에서 신규 가게 {len(result)}개 조회 완료")
+            logger.debug("DB에서 신규 가게 %d개 조회 완료", len(result))
             return result
             
         except Exception as e:
-            print(f"신규 가게 조회 실패: {e}")
+            logger.warning("신규 가게 조회 실패: %s", e)
             return []
     
     def _fetch_popular_stores_from_db(self) -> List[Dict]:
@@ -112,54 +264,15 @@ class RecommendationService:
         """
         engine = self._get_db_engine()
         if engine is None:
-            print("DB 연결 실패로 인기 가게를 조회할 수 없습니다.")
+            logger.warning("DB 연결 실패로 인기 가게를 조회할 수 없습니다.")
             return []
         
         try:
             # 전체 사용자의 방문 횟수를 집계하여 인기 가게 찾기
-            queries = [
-                # Case 1: stores.store_id
-                """
-                    SELECT 
-                        s.address as store_address,
-                        COUNT(o.order_id) as visit_count
-                    FROM orders o
-                    INNER JOIN stores s ON o.store_id = s.store_id
-                    WHERE s.address IS NOT NULL 
-                      AND s.address != ''
-                    GROUP BY s.address
-                    HAVING visit_count > 0
-                    ORDER BY visit_count DESC
-                    LIMIT 20
-                """,
-                # Case 2: stores.id
-                """
-                    SELECT 
-                        s.address as store_address,
-                        COUNT(o.order_id) as visit_count
-                    FROM orders o
-                    INNER JOIN stores s ON o.store_id = s.id
-                    WHERE s.address IS NOT NULL 
-                      AND s.address != ''
-                    GROUP BY s.address
-                    HAVING visit_count > 0
-                    ORDER BY visit_count DESC
-                    LIMIT 20
-                """
-            ]
+            df = self._read_sql(_Q_POPULAR_STORES[self._get_store_pk(engine)], engine)
             
-            df = None
-            for i, query in enumerate(queries, 1):
-                try:
-                    df = pd.read_sql(query, engine)
-                    print(f"인기 가게 쿼리 패턴 {i} 성공!")
-                    break
-                except Exception as e:
-                    print(f"인기 가게 쿼리 패턴 {i} 실패: {str(e)[:100]}")
-                    continue
-            
-            if df is None or df.empty:
-                print("인기 가게가 없습니다.")
+            if df.empty:
+                logger.debug("인기 가게가 없습니다.")
                 return []
             
             result = df.to_dict('records')
@@ -167,11 +280,11 @@ class RecommendationService:
             for record in result:
                 record['visit_count'] = int(record['visit_count'])
             
-            print(f"DB에서 인기 가게 {len(result)}개 조회 완료")
+            logger.debug("DB에서 인기 가게 %d개 조회 완료", len(result))
             return result
             
         except Exception as e:
-            print(f"인기 가게 조회 실패: {e}")
+            logger.warning("인기 가게 조회 실패: %s", e)
             return []
     
     def _fetch_user_visit_data_from_db(self, user_id: str) -> List[Dict]:
@@ -184,55 +297,17 @@ class RecommendationService:
         """
         engine = self._get_db_engine()
         if engine is None:
-            print("DB 연결 실패로 사용자 방문 데이터를 조회할 수 없습니다.")
+            logger.warning("DB 연결 실패로 사용자 방문 데이터를 조회할 수 없습니다.")
             return []
         
         try:
-            queries = [
-                # Case 1: stores.store_id
-                f"""
-                    SELECT 
-                        o.user_id,
-                        s.address as store_address,
-                        COUNT(o.order_id) as visit_count
-                    FROM orders o
-                    INNER JOIN stores s ON o.store_id = s.store_id
-                    WHERE o.user_id = {user_id}
-                      AND s.address IS NOT NULL 
-                      AND s.address != ''
-                    GROUP BY o.user_id, s.address
-                    HAVING visit_count > 0
-                    ORDER BY visit_count DESC
-                """,
-                # Case 2: stores.id
-                f"""
-                    SELECT 
-                        o.user_id,
-                        s.address as store_address,
-                        COUNT(o.order_id) as visit_count
-                    FROM orders o
-                    INNER JOIN stores s ON o.store_id = s.id
-                    WHERE o.user_id = {user_id}
-                      AND s.address IS NOT NULL 
-                      AND s.address != ''
-                    GROUP BY o.user_id, s.address
-                    HAVING visit_count > 0
-                    ORDER BY visit_count DESC
-                """
-            ]
+            # user_id는 쿼리 문자열에 넣지 않고 바인드 파라미터로 전달
+            params = {"user_id": int(user_id)}
             
-            df = None
-            for i, query in enumerate(queries, 1):
-                try:
-                    df = pd.read_sql(query, engine)
-                    print(f"사용자 방문 데이터 쿼리 패턴 {i} 성공!")
-                    break
-                except Exception as e:
-                    print(f"사용자 방문 데이터 쿼리 패턴 {i} 실패: {str(e)[:100]}")
-                    continue
+            df = self._read_sql(_Q_USER_VISITS[self._get_store_pk(engine)], engine, params=params)
             
-            if df is None or df.empty:
-                print(f"사용자 {user_id}의 방문 데이터가 없습니다.")
+            if df.empty:
+                logger.debug("사용자 %s의 방문 데이터가 없습니다.", user_id)
                 return []
             
             result = df.to_dict('records')
@@ -241,132 +316,109 @@ class RecommendationService:
                 record['user_id'] = str(record['user_id'])
                 record['visit_count'] = int(record['visit_count'])
             
-            print(f"DB에서 사용자 {user_id}의 방문 데이터 {len(result)}개 조회 완료")
+            logger.debug("DB에서 사용자 %s의 방문 데이터 %d개 조회 완료", user_id, len(result))
             return result
             
         except Exception as e:
-            print(f"사용자 방문 데이터 조회 실패: {e}")
+            logger.warning("사용자 방문 데이터 조회 실패: %s", e)
             return []
     
     def _get_db_engine(self):
         """SQLAlchemy 엔진 생성 (lazy loading)"""
         if self.db_engine is None:
             try:
-                self.db_engine = create_engine(get_database_url(), pool_pre_ping=True)
-                print("MySQL 연결 성공")
+                # 동시 요청에서 조회가 커넥션을 기다리지 않도록 풀을 넉넉하게, 오래된 커넥션은 30분마다 교체
+                self.db_engine = create_engine(
+                    get_database_url(), pool_pre_ping=True, pool_size=8, max_overflow=16, pool_recycle=1800
+                )
+                logger.info("MySQL 연결 성공")
             except Exception as e:
-                print(f"MySQL 연결 실패: {e}")
+                logger.warning("MySQL 연결 실패: %s", e)
                 self.db_engine = None
         return self.db_engine
     
-    def _fetch_visit_data_from_db(self) -> List[Dict]:
+    def _get_store_pk(self, engine) -> str:
+        """
+        stores 테이블의 기본키 컬럼 이름(store_id 또는 id)을 스키마에서 한 번만 확인하고 재사용
+        (매 조회마다 두 가지 조인 쿼리를 차례로 시도하지 않도록)
+        """
+        if self._store_pk is None:
+            columns = set(self._read_sql(_Q_STORE_PK_COLUMNS, engine)['column_name'].str.lower())
+            self._store_pk = 'store_id' if 'store_id' in columns else 'id'
+            logger.info("stores 테이블 조인 컬럼: %s", self._store_pk)
+        return self._store_pk
+    
+    def _read_sql(self, query, engine, params: Dict = None, **partition) -> pd.DataFrame:
+        """
+        쿼리(text()) 결과를 DataFrame으로 조회
+        connectorx가 있으면 Arrow 버퍼로 바로 읽고 (partition_on/partition_num을 주면 나눠서 병렬 조회),
+        없거나 바인드 파라미터를 받았으면 pd.read_sql 사용
+        """
+        if connectorx is not None and not params:
+            # connectorx는 SQLAlchemy 드라이버 표기(mysql+pymysql)를 모르므로 mysql:// 형식으로 변환
+            url = make_url(get_database_url()).set(drivername='mysql').render_as_string(hide_password=False)
+            return connectorx.read_sql(url, str(query), return_type='pandas', protocol='binary', **partition)
+        return pd.read_sql(query, engine, params=params)
+    
+    def _fetch_visit_data_from_db(self) -> pd.DataFrame:
         """
         MySQL DB에서 직접 모든 사용자 방문 데이터 조회
+        행이 많으므로 dict 리스트로 바꾸지 않고 DataFrame 그대로 반환 (CollaborativeFilteringModel.train에 바로 전달 가능)
         
         Returns:
-            [{"user_id": "1", "store_address": "주소", "visit_count": 5}, ...]
+            user_id(str), store_address, visit_count(int32) 컬럼의 DataFrame (조회 실패 시 빈 DataFrame)
         """
+        empty = pd.DataFrame(columns=['user_id', 'store_address', 'visit_count'])
         engine = self._get_db_engine()
         if engine is None:
-            print("DB 연결 실패로 MySQL 데이터를 가져올 수 없습니다.")
-            return []
+            logger.warning("DB 연결 실패로 MySQL 데이터를 가져올 수 없습니다.")
+            return empty
         
         try:
-            print(f"MySQL 쿼리 실행 중...")
-            
-            # stores 테이블의 기본키가 store_id인지 id인지 확인 후 시도
-            queries = [
-                # Case 1: stores.store_id (일반적인 경우)
-                """
-                    SELECT 
-                        o.user_id,
-                        s.address as store_address,
-                        COUNT(o.order_id) as visit_count
-                    FROM orders o
-                    INNER JOIN stores s ON o.store_id = s.store_id
-                    WHERE s.address IS NOT NULL 
-                      AND s.address != ''
-                    GROUP BY o.user_id, s.address
-                    HAVING visit_count > 0
-                    ORDER BY o.user_id, visit_count DESC
-                """,
-                # Case 2: stores.id (대안)
-                """
-                    SELECT 
-                        o.user_id,
-                        s.address as store_address,
-                        COUNT(o.order_id) as visit_count
-                    FROM orders o
-                    INNER JOIN stores s ON o.store_id = s.id
-                    WHERE s.address IS NOT NULL 
-                      AND s.address != ''
-                    GROUP BY o.user_id, s.address
-                    HAVING visit_count > 0
-                    ORDER BY o.user_id, visit_count DESC
-                """
-            ]
-            
-            df = None
-            last_error = None
-            
-            # 두 가지 쿼리를 순서대로 시도
-            for i, query in enumerate(queries, 1):
-                try:
-                    df = pd.read_sql(query, engine)
-                    print(f"쿼리 패턴 {i} 성공!")
-                    break
-                except Exception as e:
-                    last_error = e
-                    print(f"쿼리 패턴 {i} 실패: {str(e)[:100]}")
-                    continue
+            logger.debug("MySQL 쿼리 실행 중...")
             
-            if df is None:
-                raise last_error if last_error else Exception("모든 쿼리 패턴 실패")
+            query = _Q_ALL_VISITS[self._get_store_pk(engine)]
+            if connectorx is not None:
+                chunks = [self._read_sql(query, engine, partition_on='user_id', partition_num=4)]
+            else:
+                # 서버 측 커서(SSCursor)로 VISIT_FETCH_CHUNK_SIZE행씩 받아서 바로 변환
+                # (결과 전체를 드라이버 버퍼에 올린 뒤 DataFrame으로 다시 복사하지 않도록)
+                chunks = pd.read_sql(
+                    query.execution_options(stream_results=True),
+                    engine,
+                    chunksize=VISIT_FETCH_CHUNK_SIZE
+                )
+            
+            # user_id는 문자열, visit_count는 정수로 컬럼 단위 변환
+            df = pd.concat(
+                [
+                    chunk.astype({'user_id': str, 'visit_count': 'int32'})
+                    for chunk in chunks if not chunk.empty
+                ] or [empty],
+                ignore_index=True
+            )
             
             if df.empty:
-                print("MySQL에서 조회된 데이터가 없습니다.")
-                return []
+                logger.debug("MySQL에서 조회된 데이터가 없습니다.")
+                return empty
             
-            # Dict 리스트로 변환
-            visit_data = df.to_dict('records')
+            logger.debug("MySQL에서 방문 데이터 조회 완료: %d개 레코드, 사용자 %d명", len(df), df['user_id'].nunique())
             
-            # user_id를 문자열로 변환
-            for record in visit_data:
-                record['user_id'] = str(record['user_id'])
-                record['visit_count'] = int(record['visit_count'])
-            
-            print(f"MySQL에서 방문 데이터 조회 완료: {len(visit_data)}개 레코드")
-            print(f"  사용자 수: {len(df['user_id'].unique())}명")
-            
-            # 샘플 데이터 출력 (디버깅용)
-            if len(visit_data) > 0:
-                print(f"  샘플 데이터: {visit_data[0]}")
-            
-            return visit_data
+            return df
             
         except Exception as e:
-            print(f"MySQL 데이터 조회 실패: {e}")
-            return []
+            logger.warning("MySQL 데이터 조회 실패: %s", e)
+            return empty
     
     def _ensure_data_loaded(self):
         """데이터가 로드되었는지 확인하고, 안되어 있으면 로드"""
-        if self.stores_df is None and not self._is_loading:
-            self._is_loading = True
+        if self.stores_df is None:
             try:
                 self.stores_df = self._load_stores_from_excel()
-                print(f"가게 데이터 로드 완료: {len(self.stores_df)}개 가게")
+                logger.info("가게 데이터 로드 완료: %d개 가게", len(self.stores_df))
                 
-                # 성능 향상: 주소 인덱스 생성 (O(1) 검색)
-                if not hasattr(self, '_address_index'):
-                    self._address_index = {}
-                    for idx, row in self.stores_df.iterrows():
-                        address = str(row['address']).strip()
-                        if address not in self._address_index:
-                            self._address_index[address] = row.to_dict()
-                    print(f"주소 인덱스 생성: {len(self._address_index)}개 주소")
-                    
             except Exception as e:
-                print(f"데이터 로드 실패: {e}")
+                logger.warning("데이터 로드 실패: %s", e)
                 # 최소한의 Mock 데이터
                 self.stores_df = pd.DataFrame([{
                     "store_id": "store0001",
@@ -378,9 +430,52 @@ class RecommendationService:
                     "rating": 4.5,
                     "review_count": 100
                 }])
-                self._address_index = {}
-            finally:
-                self._is_loading = False
+            
+            self._build_store_arrays()
+    
+    def _build_store_arrays(self):
+        """
+        거리/점수 계산용 컬럼을 NumPy 배열로 저장 (가게 전체를 한 번에 계산하기 위해)
+        가게 정보도 행 번호로 바로 꺼낼 수 있도록 dict 리스트와 ID -> 행 번호 인덱스로 저장
+        """
+        self._store_records = self.stores_df.to_dict('records')
+        
+        # 가게 ID -> 행 번호 (중복 ID는 첫 행 사용)
+        # Spring Boot의 숫자 ID도 바로 찾을 수 있도록 "store0012" -> 12 형태로 함께 저장
+        self._id_to_row = {}
+        self._spring_id_to_row = {}
+        for row, store_id in enumerate(self.stores_df['store_id']):
+            self._id_to_row.setdefault(store_id, row)
+            number = str(store_id)[5:]
+            if number.isdigit() and store_id == f"store{int(number):04d}":
+                self._spring_id_to_row.setdefault(int(number), row)
+        
+        # 주소 -> 행 번호 (원래 주소와 앞뒤 공백을 제거한 주소 모두 등록, 중복 주소는 첫 행 사용)
+        self._address_to_row = {}
+        for row, address in enumerate(self.stores_df['address'].astype(str)):
+            self._address_to_row.setdefault(address, row)
+            self._address_to_row.setdefault(address.strip(), row)
+        logger.info("주소 인덱스 생성: %d개 주소", len(self._address_to_row))
+        
+        # 주소 -> 가게 ID (협업 필터링 훈련 시 방문 기록을 가게 ID로 바로 변환)
+        store_ids = self.stores_df['store_id'].tolist()
+        self._address_to_store_id = {address: store_ids[row] for address, row in self._address_to_row.items()}
+        
+        self._lat = self.stores_df['latitude'].to_numpy(dtype=np.float64)
+        self._lon = self.stores_df['longitude'].to_numpy(dtype=np.float64)
+        self._rating = self.stores_df['rating'].to_numpy(dtype=np.float64)
+        # 거리 계산용 라디안 좌표와 cos(위도)는 요청마다 바뀌지 않으므로 미리 계산
+        self._lat_rad = np.radians(self._lat)
+        self._lon_rad = np.radians(self._lon)
+        self._cos_lat = np.cos(self._lat_rad)
+        # 중복 체크용 주소 배열 (요청마다 DataFrame 컬럼을 다시 꺼내지 않도록)
+        self._addresses = self.stores_df['address'].to_numpy()
+        # 반경 검색용 공간 인덱스 (haversine 거리, 라디안 좌표)
+        self._store_tree = BallTree(np.column_stack([self._lat_rad, self._lon_rad]), metric='haversine')
+        
+        # 여러 스레드가 함께 읽는 배열이므로 읽기 전용으로 고정
+        for array in (self._lat, self._lon, self._rating, self._lat_rad, self._lon_rad, self._cos_lat, self._addresses):
+            array.flags.writeable = False
     
     def _train_cf_model(self, visit_data: List[Dict]):
         """
@@ -393,12 +488,12 @@ class RecommendationService:
             current_user_id = None
             if visit_data and len(visit_data) > 0:
                 current_user_id = visit_data[0].get("user_id")
-                print(f"현재 사용자: {current_user_id}, 방문 기록: {len(visit_data)}개")
+                logger.debug("현재 사용자: %s, 방문 기록: %d개", current_user_id, len(visit_data))
             else:
-                print("Spring Boot에서 현재 사용자 방문 데이터가 비어있습니다.")
+                logger.debug("Spring Boot에서 현재 사용자 방문 데이터가 비어있습니다.")
             
             # Spring Boot 데이터만 사용 (MySQL 조회 생략하여 속도 향상)
-            print(f"Spring Boot 데이터만 사용합니다 (빠른 응답을 위해 MySQL 조회 생략)")
+            logger.debug("Spring Boot 데이터만 사용합니다 (빠른 응답을 위해 MySQL 조회 생략)")
             all_visit_data = []
             
             # Spring Boot의 현재 사용자 데이터 사용
@@ -407,10 +502,10 @@ class RecommendationService:
             
             # 사용자 수 확인
             unique_users = set(v.get("user_id") for v in all_visit_data if v.get("user_id"))
-            print(f"전체 데이터: {len(unique_users)}명 사용자, {len(all_visit_data)}개 레코드")
+            logger.debug("전체 데이터: %d명 사용자, %d개 레코드", len(unique_users), len(all_visit_data))
             
             if len(unique_users) < 2:
-                print(f"사용자가 {len(unique_users)}명뿐입니다. 인기 기반 추천으로 대체합니다.")
+                logger.debug("사용자가 %d명뿐입니다. 인기 기반 추천으로 대체합니다.", len(unique_users))
                 # 사용자가 적어도 방문 데이터가 있으면 모델 훈련 시도
                 if len(all_visit_data) > 0:
                     pass  # 계속 진행 (인기 기반 추천 사용)
@@ -421,24 +516,22 @@ class RecommendationService:
             visit_data = all_visit_data
             
             # 주소로 가게 찾아서 store_id 생성
+            address_to_store_id = self._address_to_store_id
             formatted_visit_data = []
             for visit in visit_data:
-                # 주소로 가게 찾기
                 store_address = visit.get("store_address")
                 store_id = visit.get("store_id")
                 
                 if store_address:
-                    # 주소로 가게 찾기
-                    store = self._get_store_by_address(store_address)
-                    if store:
+                    # 주소로 가게 ID 찾기 (정확한 주소 -> 공백 제거한 주소), 못 찾으면 스킵
+                    address = str(store_address)
+                    found_id = address_to_store_id.get(address) or address_to_store_id.get(address.strip())
+                    if found_id:
                         formatted_visit_data.append({
                             "user_id": visit["user_id"],
-                            "store_id": store["store_id"],
+                            "store_id": found_id,
                             "visit_count": visit["visit_count"]
                         })
-                    else:
-                        # 주소를 찾을 수 없으면 스킵 (출력은 하지 않음, 너무 많을 수 있음)
-                        pass
                 elif store_id:
                     # store_id로 변환
                     formatted_visit_data.append({
@@ -448,19 +541,19 @@ class RecommendationService:
                     })
             
             if not formatted_visit_data:
-                print("협업 필터링: 유효한 방문 데이터가 없습니다.")
+                logger.debug("협업 필터링: 유효한 방문 데이터가 없습니다.")
                 return False
             
             # 모델 훈련
             self.cf_model.train(formatted_visit_data, n_neighbors=10)
             
-            # 모델 통계 출력
-            stats = self.cf_model.get_model_stats()
-            print(f"협업 필터링 모델 훈련 완료: {stats}")
+            # 모델 통계 출력 (통계 계산 자체가 행렬 합계를 구하므로 DEBUG일 때만)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("협업 필터링 모델 훈련 완료: %s", self.cf_model.get_model_stats())
             return True
             
         except Exception as e:
-            print(f"협업 필터링 모델 훈련 실패: {e}")
+            logger.warning("협업 필터링 모델 훈련 실패: %s", e)
             return False
     
     def _load_stores_from_excel(self) -> pd.DataFrame:
@@ -474,7 +567,18 @@ class RecommendationService:
             if not os.path.exists(excel_path):
                 excel_path = os.path.join(project_root, "ai_data", "마포구_전체_가게.xlsx")
             
-            print(f"XLSX 파일 로드 시도: {excel_path}")
+            # 전처리까지 끝난 Parquet 캐시가 엑셀보다 최신이면 그대로 사용 (파일 이름에 전처리 버전 포함)
+            # 캐시를 읽지 못하면 Mock 데이터가 아니라 엑셀 파싱으로 넘어감
+            cache_path = f"{os.path.splitext(excel_path)[0]}_stores_v{STORE_CACHE_VERSION}.parquet"
+            if os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(excel_path):
+                try:
+                    df = pd.read_parquet(cache_path)
+                    logger.info("Parquet 캐시 로드: %s", cache_path)
+                    return df
+                except Exception as e:
+                    logger.warning("Parquet 캐시 로드 실패, 엑셀을 다시 읽습니다: %s", e)
+            
+            logger.info("XLSX 파일 로드 시도: %s", excel_path)
             df = pd.read_excel(excel_path)
             # 필요한 컬럼만 선택 및 이름 변경
             # 업소명 → name, 도로명(수정) → address, 업태명 → category
@@ -502,11 +606,24 @@ class RecommendationService:
             if 'review_count' not in df.columns:
                 df['review_count'] = 50 + (df.index % 20) * 10  # 50 ~ 240
             
+            # 다음 시작부터는 엑셀 파싱 없이 로드하도록 캐시 저장
+            # 여러 워커가 동시에 쓰거나 읽어도 반쯤 쓴 파일이 보이지 않도록 임시 파일에 쓴 뒤 교체
+            tmp_path = None
+            try:
+                fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(cache_path), suffix=".parquet.tmp")
+                os.close(fd)
+                df.to_parquet(tmp_path, compression='zstd', index=False)
+                os.replace(tmp_path, cache_path)
+            except Exception as e:
+                logger.warning("Parquet 캐시 저장 실패: %s", e)
+                if tmp_path is not None and os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            
             return df
             
         except Exception as e:
-            print(f"xlsx 파일 로드 실패: {str(e)}")
-            print("Mock 데이터를 사용합니다.")
+            logger.warning("xlsx 파일 로드 실패: %s", e)
+            logger.warning("Mock 데이터를 사용합니다.")
             # Mock 데이터 반환
             return pd.DataFrame([
                 {
@@ -523,31 +640,21 @@ class RecommendationService:
     
     def _get_store_by_id(self, store_id: str) -> Dict:
         """가게 ID로 가게 정보 조회"""
-        self._ensure_data_loaded()  # 데이터 로드 확인
-        store_row = self.stores_df[self.stores_df['store_id'] == store_id]
-        if len(store_row) == 0:
-            return None
-        return store_row.iloc[0].to_dict()
+        row = self._id_to_row.get(store_id)
+        return self._store_records[row] if row is not None else None
+    
+    def _get_row_by_address(self, store_address: str):
+        """주소로 가게 행 번호 조회 (정확한 주소 -> 공백 제거한 주소 순으로 인덱스에서 O(1) 검색, 없으면 None)"""
+        address = str(store_address)
+        row = self._address_to_row.get(address)
+        if row is None:
+            row = self._address_to_row.get(address.strip())
+        return row
     
     def _get_store_by_address(self, store_address: str) -> Dict:
-        """주소로 가게 정보 조회 (인덱스 사용으로 O(1) 성능)"""
-        self._ensure_data_loaded()  # 데이터 로드 확인
-        
-        # 1. 인덱스에서 정확한 주소 검색 (O(1))
-        address_key = str(store_address).strip()
-        if hasattr(self, '_address_index') and address_key in self._address_index:
-            return self._address_index[address_key]
-        
-        # 2. 인덱스 없으면 기존 방식 (fallback)
-        store_row = self.stores_df[self.stores_df['address'] == store_address]
-        
-        if len(store_row) == 0:
-            store_row = self.stores_df[self.stores_df['address'].str.strip() == store_address.strip()]
-        
-        if len(store_row) == 0:
-            return None
-            
-        return store_row.iloc[0].to_dict()
+        """주소로 가게 정보 조회"""
+        row = self._get_row_by_address(store_address)
+        return self._store_records[row] if row is not None else None
     
     def _get_store(self, store_id: str = None, store_address: str = None) -> Dict:
         """가게 정보 조회 (store_address 우선, 없으면 store_id 사용)"""
@@ -557,37 +664,87 @@ class RecommendationService:
             if store:
                 return store
         
-        # store_address가 없거나 못 찾았으면 store_id로 찾기
+        # store_address가 없거나 못 찾았으면 store_id로 찾기 ("store0012" 문자열을 만들지 않고 숫자로 바로 조회)
         if store_id:
-            xlsx_store_id = f"store{int(store_id):04d}"
-            return self._get_store_by_id(xlsx_store_id)
+            row = self._spring_id_to_row.get(int(store_id))
+            return self._store_records[row] if row is not None else None
         
         return None
     
-    def _calculate_distance(self, user_lat: float, user_lon: float, store: Dict) -> float:
-        """사용자와 가게 사이의 거리 계산"""
-        return haversine_distance(user_lat, user_lon, store["latitude"], store["longitude"])
-    
-    def _create_store_info(self, store: Dict, distance: float, score: float, reasons: List[str]) -> StoreInfo:
-        """StoreInfo 객체 생성"""
-        return StoreInfo(
-            store_id=store["store_id"],
-            name=store["name"],
-            category=store["category"],
-            address=store["address"],
-            latitude=store["latitude"],
-            longitude=store["longitude"],
-            distance_km=distance,
-            rating=store["rating"],
-            review_count=store["review_count"],
-            is_new=False,
-            opened_date=None,
-            events=None,
-            recommendation_score=score,
-            recommendation_reason=reasons
+    def _lookup_stores(self, user_lat: float, user_lon: float, store_addresses: Iterable[str]) -> Dict[str, Tuple[Dict, float]]:
+        """
+        여러 가게 주소를 한 번에 조회하고 사용자와의 거리도 한 번에 계산
+        (같은 주소는 한 번만 조회, 찾지 못한 주소는 결과에서 빠짐)
+        
+        Returns:
+            {주소: (가게 정보, 거리 km)}
+        """
+        # 주소 -> 행 번호만 찾고, 좌표는 가게 dict 대신 미리 만들어 둔 라디안 배열에서 행 번호로 꺼냄
+        rows = {}
+        for address in store_addresses:
+            if address and address not in rows:
+                rows[address] = self._get_row_by_address(address)
+        found = {address: row for address, row in rows.items() if row is not None}
+        if not found:
+            return {}
+        
+        indices = np.fromiter(found.values(), dtype=np.intp, count=len(found))
+        distances = haversine_distances_rad(
+            math.radians(user_lat), math.radians(user_lon),
+            self._lat_rad[indices], self._lon_rad[indices], self._cos_lat[indices]
         )
+        return {
+            address: (self._store_records[row], float(distance))
+            for (address, row), distance in zip(found.items(), distances)
+        }
     
-    def recommend_event_stores(self, user_lat: float, user_lon: float, event_stores_data: List[Dict]) -> List[SimpleStoreInfo]:
+    @staticmethod
+    def _top_candidate_count() -> int:
+        """카테고리별로 뽑을 후보 수 (반환은 2개, DEBUG 로그에는 상위 5개까지 출력)"""
+        return 5 if logger.isEnabledFor(logging.DEBUG) else 2
+    
+    def _match_stores(
+        self, stores_data: List[Dict], store_lookup: Dict, excluded_addresses: set = None
+    ) -> Tuple[List[Dict], List[Dict], np.ndarray]:
+        """
+        카테고리 데이터 중 가게를 찾은 항목만 골라서 (데이터, 가게 정보, 거리 배열)로 반환
+        excluded_addresses에 있는 가게는 점수 계산 전에 제외
+        점수는 호출하는 쪽에서 거리 배열로 한 번에 계산
+        """
+        matched_data, matched_stores, distances = [], [], []
+        for data in stores_data:
+            found = store_lookup.get(data.get("store_address"))
+            if not found:
+                logger.debug("가게를 찾을 수 없음: store_address=%s", data.get("store_address"))
+                continue
+            if excluded_addresses and found[0]["address"] in excluded_addresses:
+                logger.debug("AI 추천과 중복되어 제외: %s", found[0]["name"])
+                continue
+            matched_data.append(data)
+            matched_stores.append(found[0])
+            distances.append(found[1])
+        return matched_data, matched_stores, np.array(distances, dtype=np.float64)
+    
+    def _pick_top_stores(self, label: str, stores: List[Dict], distances: np.ndarray, scores: np.ndarray) -> List[SimpleStoreInfo]:
+        """
+        점수 배열에서 상위 2개 가게만 골라 SimpleStoreInfo로 변환 (DEBUG 로그에는 상위 5개까지 출력)
+        """
+        top_indices = top_k_indices(scores, self._top_candidate_count())
+        
+        logger.debug("%s 최종 후보: %d개", label, len(stores))
+        if logger.isEnabledFor(logging.DEBUG):
+            for rank, i in enumerate(top_indices, 1):
+                logger.debug("  %d. %s - 점수: %.2f, 거리: %.2fkm", rank, stores[i]["name"], scores[i], distances[i])
+        
+        # 가게 테이블에서 꺼낸 값이므로 검증 없이 바로 생성 (응답 직렬화 때 한 번만 타입을 확인)
+        result = [SimpleStoreInfo.model_construct(name=stores[i]["name"], address=stores[i]["address"]) for i in top_indices[:2]]
+        logger.debug("%s 최종 반환: %d개", label, len(result))
+        return result
+    
+    def recommend_event_stores(
+        self, user_lat: float, user_lon: float, event_stores_data: List[Dict], store_lookup: Dict = None,
+        excluded_addresses: set = None
+    ) -> List[SimpleStoreInfo]:
         """
         1. 이벤트 참여 가게 추천 (경험치 2배 부여 등)
         - 경험치 배수가 높은 순
@@ -598,51 +755,24 @@ class RecommendationService:
             user_lat: 사용자 위도
             user_lon: 사용자 경도
             event_stores_data: DB에서 조회한 이벤트 가게 데이터
+            store_lookup: _lookup_stores로 미리 조회한 가게 정보와 거리 (없으면 여기서 조회)
+            excluded_addresses: 추천에서 뺄 가게 주소 (AI 추천 가게)
         """
-        candidates = []
+        if store_lookup is None:
+            store_lookup = self._lookup_stores(user_lat, user_lon, (d.get("store_address") for d in event_stores_data))
         
-        for event_data in event_stores_data:
-            # 가게 조회 (주소로 찾기)
-            store_address = event_data.get("store_address")
-            exp_multiplier = event_data.get("exp_multiplier", 1.0)
-            
-            print(f"이벤트 가게 찾기: address={store_address}")
-            store = self._get_store_by_address(store_address)
-            if not store:
-                print(f"가게를 찾을 수 없음: store_address={store_address}")
-                continue
-            print(f"가게 찾음: {store['name']} at {store['address']}")
-            
-            distance = self._calculate_distance(user_lat, user_lon, store)
-            print(f"   거리: {distance:.2f}km")
-            
-            # 점수 = 경험치 배수 * 30 - 거리 * 2 (거리 패널티)
-            score = exp_multiplier * 30 - distance * 2
-            print(f"   점수: {score:.2f} (경험치 배수: {exp_multiplier})")
-            
-            reasons = [
-                f"경험치 {exp_multiplier}배 이벤트",
-                f"거리 {distance:.1f}km"
-            ]
-            
-            store_info = self._create_store_info(store, distance, score, reasons)
-            candidates.append(store_info)
-        
-        # 점수 높은 순으로 정렬
-        candidates.sort(key=lambda x: x.recommendation_score, reverse=True)
-        
-        print(f"이벤트 가게 최종 후보: {len(candidates)}개")
-        for i, c in enumerate(candidates[:5]):  # 상위 5개만 출력
-            print(f"  {i+1}. {c.name} - 점수: {c.recommendation_score:.2f}, 거리: {c.distance_km:.2f}km")
+        matched, stores, distances = self._match_stores(event_stores_data, store_lookup, excluded_addresses)
+        exp_multipliers = np.array([d.get("exp_multiplier", 1.0) for d in matched], dtype=np.float64)
         
-        result = candidates[:2]
-        print(f"이벤트 가게 최종 반환: {len(result)}개")
+        # 점수 = 경험치 배수 * 30 - 거리 * 2 (거리 패널티)
+        scores = exp_multipliers * 30 - distances * 2
         
-        # SimpleStoreInfo로 변환 (name, address만)
-        simple_result = [SimpleStoreInfo(name=store.name, address=store.address) for store in result]
-        return simple_result
+        return self._pick_top_stores("이벤트 가게", stores, distances, scores)
     
-    def recommend_new_stores(self, user_lat: float, user_lon: float, new_stores_data: List[Dict]) -> List[SimpleStoreInfo]:
+    def recommend_new_stores(
+        self, user_lat: float, user_lon: float, new_stores_data: List[Dict], store_lookup: Dict = None,
+        excluded_addresses: set = None
+    ) -> List[SimpleStoreInfo]:
         """
         2. 신규 가입 가게 추천
         - 최근 가입한 순
@@ -653,63 +783,33 @@ class RecommendationService:
             user_lat: 사용자 위도
             user_lon: 사용자 경도
             new_stores_data: DB에서 조회한 신규 가게 데이터
+            store_lookup: _lookup_stores로 미리 조회한 가게 정보와 거리 (없으면 여기서 조회)
+            excluded_addresses: 추천에서 뺄 가게 주소 (AI 추천 가게)
         """
-        current_date = datetime.now()
-        candidates = []
-        
-        print(f"\n 신규 가게 추천 시작: {len(new_stores_data)}개 후보")
+        if store_lookup is None:
+            store_lookup = self._lookup_stores(user_lat, user_lon, (d.get("store_address") for d in new_stores_data))
         
-        for new_data in new_stores_data:
-            store_address = new_data.get("store_address")
-            joined_date = new_data.get("joined_date")
-            
-            print(f"신규 가게 찾기: address={store_address}")
-            
-            # 가게 조회
-            store = self._get_store_by_address(store_address)
-            if not store:
-                print(f"가게를 찾을 수 없음: store_address={store_address}")
-                continue
-            
-            print(f"가게 찾음: {store['name']} at {store['address']}")
-            
-            distance = self._calculate_distance(user_lat, user_lon, store)
-            
-            # 가입한 지 며칠 됐는지
-            if isinstance(joined_date, str):
-                joined_date = datetime.fromisoformat(joined_date.replace('T', ' '))
-            days_since_joined = (current_date - joined_date).days
-            
-            # 점수 = (30 - 가입일수) * 2 - 거리 * 2
-            # 최근 가입일수록 높은 점수
-            score = max(0, (30 - days_since_joined) * 2) - distance * 2
-            
-            print(f"   거리: {distance:.2f}km, 가입: {days_since_joined}일 전")
-            print(f"   점수: {score:.2f}")
-            
-            reasons = [
-                f"{days_since_joined}일 전 신규 가입",
-                f"거리 {distance:.1f}km"
-            ]
-            
-            store_info = self._create_store_info(store, distance, score, reasons)
-            candidates.append(store_info)
+        logger.debug("신규 가게 추천 시작: %d개 후보", len(new_stores_data))
         
-        # 점수 높은 순으로 정렬
-        candidates.sort(key=lambda x: x.recommendation_score, reverse=True)
+        matched, stores, distances = self._match_stores(new_stores_data, store_lookup, excluded_addresses)
         
-        print(f"신규 가게 최종 후보: {len(candidates)}개")
-        for i, c in enumerate(candidates[:5]):
-            print(f"  {i+1}. {c.name} - 점수: {c.recommendation_score:.2f}, 거리: {c.distance_km:.2f}km")
+        # 가입한 지 며칠 됐는지 (DB에서 조회한 데이터는 조회할 때 한 번에 계산되어 있음)
+        current_date = datetime.now()
+        days_since_joined = np.array([
+            d["days_since_joined"] if d.get("days_since_joined") is not None else (current_date - d["joined_date"]).days
+            for d in matched
+        ], dtype=np.float64)
         
-        result = candidates[:2]
-        print(f"신규 가게 최종 반환: {len(result)}개\n")
+        # 점수 = (30 - 가입일수) * 2 - 거리 * 2
+        # 최근 가입일수록 높은 점수
+        scores = np.maximum(0, (30 - days_since_joined) * 2) - distances * 2
         
-        # SimpleStoreInfo로 변환 (name, address만)
-        simple_result = [SimpleStoreInfo(name=store.name, address=store.address) for store in result]
-        return simple_result
+        return self._pick_top_stores("신규 가게", stores, distances, scores)
     
-    def recommend_popular_stores(self, user_lat: float, user_lon: float, popular_stores_data: List[Dict]) -> List[SimpleStoreInfo]:
+    def recommend_popular_stores(
+        self, user_lat: float, user_lon: float, popular_stores_data: List[Dict], store_lookup: Dict = None,
+        excluded_addresses: set = None
+    ) -> List[SimpleStoreInfo]:
         """
         3. 인기 가게 추천 (유저들이 많이 방문한 가게)
         - 방문 횟수가 많은 순
@@ -720,55 +820,21 @@ class RecommendationService:
             user_lat: 사용자 위도
             user_lon: 사용자 경도
             popular_stores_data: DB에서 조회한 인기 가게 데이터
+            store_lookup: _lookup_stores로 미리 조회한 가게 정보와 거리 (없으면 여기서 조회)
+            excluded_addresses: 추천에서 뺄 가게 주소 (AI 추천 가게)
         """
-        candidates = []
+        if store_lookup is None:
+            store_lookup = self._lookup_stores(user_lat, user_lon, (d.get("store_address") for d in popular_stores_data))
         
-        print(f"\n 인기 가게 추천 시작: {len(popular_stores_data)}개 후보")
-        
-        for popular_data in popular_stores_data:
-            store_address = popular_data.get("store_address")
-            visit_count = popular_data.get("visit_count", 0)
-            
-            print(f"인기 가게 찾기: address={store_address}")
-            
-            # 가게 조회
-            store = self._get_store_by_address(store_address)
-            if not store:
-                print(f"가게를 찾을 수 없음: store_address={store_address}")
-                continue
-            
-            print(f"가게 찾음: {store['name']} at {store['address']}")
-            
-            distance = self._calculate_distance(user_lat, user_lon, store)
-            
-            # 점수 = 방문횟수 / 10 - 거리 * 2
-            score = visit_count / 10 - distance * 2
-            
-            print(f"   거리: {distance:.2f}km, 방문: {visit_count}회")
-            print(f"   점수: {score:.2f}")
-            
-            reasons = [
-                f"방문 {visit_count}회",
-                f"거리 {distance:.1f}km",
-                "인기 많은 가게"
-            ]
-            
-            store_info = self._create_store_info(store, distance, score, reasons)
-            candidates.append(store_info)
+        logger.debug("인기 가게 추천 시작: %d개 후보", len(popular_stores_data))
         
-        # 점수 높은 순으로 정렬
-        candidates.sort(key=lambda x: x.recommendation_score, reverse=True)
+        matched, stores, distances = self._match_stores(popular_stores_data, store_lookup, excluded_addresses)
+        visit_counts = np.array([d.get("visit_count", 0) for d in matched], dtype=np.float64)
         
-        print(f"인기 가게 최종 후보: {len(candidates)}개")
-        for i, c in enumerate(candidates[:5]):
-            print(f"  {i+1}. {c.name} - 점수: {c.recommendation_score:.2f}, 거리: {c.distance_km:.2f}km")
+        # 점수 = 방문횟수 / 10 - 거리 * 2
+        scores = visit_counts / 10 - distances * 2
         
-        result = candidates[:2]
-        print(f"인기 가게 최종 반환: {len(result)}개\n")
-        
-        # SimpleStoreInfo로 변환 (name, address만)
-        simple_result = [SimpleStoreInfo(name=store.name, address=store.address) for store in result]
-        return simple_result
+        return self._pick_top_stores("인기 가게", stores, distances, scores)
     
     def recommend_nearby_stores(self, user_lat: float, user_lon: float, recommended_addresses: set) -> List[SimpleStoreInfo]:
         """
@@ -782,42 +848,28 @@ class RecommendationService:
             user_lon: 사용자 경도
             recommended_addresses: 이미 추천된 가게 주소들 (중복 제거용)
         """
-        self._ensure_data_loaded()  # 데이터 로드 확인
-        
-        candidates = []
-        
-        # DataFrame에서 반복
-        for idx, store in self.stores_df.iterrows():
-            # 이미 추천된 가게는 제외 (주소로 중복 체크)
-            if store.get("address") in recommended_addresses:
-                continue
-            
-            store_dict = store.to_dict()
-            distance = self._calculate_distance(user_lat, user_lon, store_dict)
-            
-            # 5km 이내만
-            if distance > 5.0:
-                continue
-            
-            # 점수 = 30 - 거리 * 5 + 평점 * 2
-            score = 30 - distance * 5 + store_dict["rating"] * 2
-            
-            reasons = [
-                f"거리 {distance:.1f}km",
-                f"평점 {store_dict['rating']:.1f}"
-            ]
-            
-            store_info = self._create_store_info(store_dict, distance, score, reasons)
-            candidates.append(store_info)
-        
-        # 점수 높은 순으로 정렬 (거리가 가깝고 평점이 높은 순)
-        candidates.sort(key=lambda x: x.recommendation_score, reverse=True)
+        user_lat_rad = math.radians(user_lat)
+        user_lon_rad = math.radians(user_lon)
+        
+        # 공간 인덱스로 반경 안의 가게만 찾음 (BallTree와 haversine_distances_rad의 부동소수점 오차를 고려해 반경을 조금 넉넉하게)
+        candidates = np.sort(self._store_tree.query_radius([[user_lat_rad, user_lon_rad]], r=5.001 / 6371.0)[0])
+        if recommended_addresses and len(candidates):
+            candidates = candidates[~np.isin(self._addresses[candidates], list(recommended_addresses))]
+        
+        # 후보 가게까지만 거리 계산 후 5km 이내로 다시 거름
+        distances = haversine_distances_rad(
+            user_lat_rad, user_lon_rad,
+            self._lat_rad[candidates], self._lon_rad[candidates], self._cos_lat[candidates]
+        )
+        within = distances <= 5.0
+        indices = candidates[within]
+        distances = distances[within]
         
-        result = candidates[:2]
+        # 점수 = 30 - 거리 * 5 + 평점 * 2
+        scores = 30 - distances * 5 + self._rating[indices] * 2
         
-        # SimpleStoreInfo로 변환 (name, address만)
-        simple_result = [SimpleStoreInfo(name=store.name, address=store.address) for store in result]
-        return simple_result
+        # 점수 높은 순으로 상위 2개만 선택 (거리가 가깝고 평점이 높은 순)
+        return self._pick_top_stores("주변 가게", [self._store_records[i] for i in indices], distances, scores)
     
     def recommend_cf_stores(self, user_id: str, user_lat: float, user_lon: float, user_visit_data: List[Dict]) -> List[SimpleStoreInfo]:
         """
@@ -832,137 +884,97 @@ class RecommendationService:
             user_lon: 사용자 경도
             user_visit_data: DB에서 조회한 사용자 방문 데이터
         """
-        self._ensure_data_loaded()  # 데이터 로드 확인
+        if not user_visit_data:
+            logger.debug("방문 데이터가 없습니다. AI 추천을 건너뜁니다.")
+            return []
         
-        # DB에서 조회한 방문 데이터로 모델 훈련
-        if user_visit_data and len(user_visit_data) > 0:
-            is_trained = self._train_cf_model(user_visit_data)
+        with self._cf_lock:
+            # 마지막 훈련과 같은 방문 데이터이고 TTL이 지나지 않았으면 기존 모델 재사용
+            fingerprint = hash(tuple(
+                (v.get("user_id"), v.get("store_address"), v.get("store_id"), v.get("visit_count"))
+                for v in user_visit_data
+            ))
+            if fingerprint == self._cf_fingerprint and time.monotonic() - self._cf_trained_at < CACHE_TTL_SECONDS:
+                is_trained = True
+            else:
+                # DB에서 조회한 방문 데이터로 모델 훈련
+                is_trained = self._train_cf_model(user_visit_data)
+                self._cf_fingerprint = fingerprint if is_trained else None
+                self._cf_trained_at = time.monotonic()
             
             if not is_trained:
-                print("협업 필터링 모델 훈련 실패. AI 추천을 건너뜁니다.")
+                logger.debug("협업 필터링 모델 훈련 실패. AI 추천을 건너뜁니다.")
                 return []
-        else:
-            print("방문 데이터가 없습니다. AI 추천을 건너뜁니다.")
-            return []
-        
-        #  AI 추천은 1순위이므로 중복 체크 없이 순수하게 추천!
-        # 다른 카테고리들이 AI 추천을 피해가도록 수정됨
-        
-        # 협업 필터링으로 가게 추천
-        cf_recommendations = self.cf_model.recommend_stores(
-            user_id=user_id,
-            n_recommendations=10,
-            exclude_visited=True
-        )
-        
-        print(f"\n 협업 필터링 결과: {len(cf_recommendations)}개 후보")
+            
+            #  AI 추천은 1순위이므로 중복 체크 없이 순수하게 추천!
+            # 다른 카테고리들이 AI 추천을 피해가도록 수정됨
+            
+            # 협업 필터링으로 가게 추천
+            cf_recommendations = self.cf_model.recommend_stores(
+                user_id=user_id,
+                n_recommendations=10,
+                exclude_visited=True
+            )
         
-        candidates = []
+        logger.debug("협업 필터링 결과: %d개 후보", len(cf_recommendations))
         
+        # 추천된 가게 ID를 행 번호로 바꾸고 거리는 한 번에 계산
+        rows, predicted_scores = [], []
         for store_id, predicted_score in cf_recommendations:
-            print(f"AI 추천 가게 찾기: store_id={store_id}, 예측 점수={predicted_score:.2f}")
-            # 가게 정보 조회
-            store = self._get_store_by_id(store_id)
-            if not store:
-                print(f"   가게를 찾을 수 없음: {store_id}")
+            row = self._id_to_row.get(store_id)
+            if row is None:
+                logger.debug("가게를 찾을 수 없음: %s", store_id)
                 continue
-            
-            print(f"   가게 찾음: {store['name']} at {store.get('address', 'N/A')}")
-            
-            store_dict = store
-            distance = self._calculate_distance(user_lat, user_lon, store_dict)
-            
-            print(f"   거리: {distance:.2f}km")
-            
-            # 거리가 너무 멀면 제외 (10km 이내)
-            if distance > 10.0:
-                print(f"   거리가 너무 멀어서 제외 (10km 이상)")
-                continue
-            
-            # 점수 = 협업 필터링 예측 점수 * 10 - 거리 * 1
-            score = predicted_score * 10 - distance * 1
-            
-            print(f"   점수: {score:.2f}")
-            
-            reasons = [
-                "AI가 당신의 취향을 분석해 추천",
-                f"유사한 사용자들이 좋아함 (예측 점수: {predicted_score:.2f})",
-                f"거리 {distance:.1f}km"
-            ]
-            
-            store_info = self._create_store_info(store_dict, distance, score, reasons)
-            candidates.append(store_info)
-            
-            # 충분히 모았으면 중단
-            if len(candidates) >= 5:
-                break
+            rows.append(row)
+            predicted_scores.append(predicted_score)
+        rows = np.array(rows, dtype=np.intp)
         
-        # 점수 높은 순으로 정렬
-        candidates.sort(key=lambda x: x.recommendation_score, reverse=True)
+        distances = haversine_distances_rad(
+            math.radians(user_lat), math.radians(user_lon),
+            self._lat_rad[rows], self._lon_rad[rows], self._cos_lat[rows]
+        )
         
-        print(f"\n AI 추천 가게 최종 후보: {len(candidates)}개")
-        for i, c in enumerate(candidates[:5]):
-            print(f"  {i+1}. {c.name} - 점수: {c.recommendation_score:.2f}, 거리: {c.distance_km:.2f}km")
+        # 거리가 너무 먼 가게는 제외 (10km 이내), 예측 점수 순으로 5개까지만 후보로 사용
+        within = np.flatnonzero(distances <= 10.0)[:5]
+        distances = distances[within]
         
-        result = candidates[:2]
-        print(f"AI 추천 가게 최종 반환: {len(result)}개\n")
+        # 점수 = 협업 필터링 예측 점수 * 10 - 거리 * 1
+        scores = np.array(predicted_scores, dtype=np.float64)[within] * 10 - distances
         
-        # SimpleStoreInfo로 변환 (name, address만)
-        simple_result = [SimpleStoreInfo(name=store.name, address=store.address) for store in result]
-        return simple_result
+        return self._pick_top_stores("AI 추천 가게", [self._store_records[r] for r in rows[within]], distances, scores)
     
     def recommend_stores(self, request: RecommendationRequest) -> RecommendationResponse:
         """
         5개 카테고리별로 2개씩 가게 추천
         에러가 발생한 카테고리는 빈 리스트로 반환하여 전체 프로세스 중단 방지
         """
-        print("\n" + "="*60)
-        print("전체 추천 프로세스 시작")
-        print(f"사용자 ID: {request.user_id}, 위치: ({request.location.latitude}, {request.location.longitude})")
-        print("="*60)
+        logger.debug("전체 추천 프로세스 시작: 사용자 ID=%s, 위치=(%s, %s)",
+                     request.user_id, request.location.latitude, request.location.longitude)
         
         # Spring Boot가 보낸 데이터 우선 사용
-        print("\n[데이터 조회] Spring Boot에서 전달받은 데이터를 확인합니다...")
-        
-        # 1. 이벤트 가게 - Spring Boot 데이터를 dict 형식으로 변환
-        event_stores_data = []
-        if request.event_stores:
-            for store in request.event_stores:
-                event_stores_data.append({
-                    "store_address": store.store_address,
-                    "exp_multiplier": store.exp_multiplier
-                })
+        # Spring Boot 데이터를 dict 형식으로 변환 (목록 전체를 한 번에 변환)
+        # 1. 이벤트 가게
+        event_stores_data = EVENT_STORE_LIST.dump_python(
+            request.event_stores, include={'__all__': {'store_address', 'exp_multiplier'}}
+        )
         
-        # 2. 신규 가게 - Spring Boot 데이터를 dict 형식으로 변환
-        new_stores_data = []
-        if request.new_stores:
-            for store in request.new_stores:
-                new_stores_data.append({
-                    "store_address": store.store_address,
-                    "joined_date": store.joined_date
-                })
+        # 2. 신규 가게
+        new_stores_data = NEW_STORE_LIST.dump_python(
+            request.new_stores, include={'__all__': {'store_address', 'joined_date'}}
+        )
         
-        # 3. 인기 가게 - Spring Boot 데이터를 dict 형식으로 변환
-        popular_stores_data = []
-        if request.popular_stores:
-            for store in request.popular_stores:
-                popular_stores_data.append({
-                    "store_address": store.store_address,
-                    "visit_count": store.visit_count
-                })
+        # 3. 인기 가게
+        popular_stores_data = POPULAR_STORE_LIST.dump_python(
+            request.popular_stores, include={'__all__': {'store_address', 'visit_count'}}
+        )
         
-        # 4. 사용자 방문 데이터 - Spring Boot 데이터를 dict 형식으로 변환
-        user_visit_data = []
-        if request.visit_statics:
-            for visit in request.visit_statics:
-                user_visit_data.append({
-                    "user_id": visit.user_id,
-                    "store_address": visit.store_address,
-                    "visit_count": visit.visit_count
-                })
+        # 4. 사용자 방문 데이터
+        user_visit_data = VISIT_DATA_LIST.dump_python(
+            request.visit_statics, include={'__all__': {'user_id', 'store_address', 'visit_count'}}
+        )
         
-        print(f"Spring Boot 데이터: 이벤트 {len(event_stores_data)}개, 신규 {len(new_stores_data)}개, "
-              f"인기 {len(popular_stores_data)}개, 방문 기록 {len(user_visit_data)}개")
+        logger.debug("Spring Boot 데이터: 이벤트 %d개, 신규 %d개, 인기 %d개, 방문 기록 %d개",
+                     len(event_stores_data), len(new_stores_data), len(popular_stores_data), len(user_visit_data))
         
         recommendations = []
         
@@ -971,113 +983,77 @@ class RecommendationService:
         
         # 1. AI 추천 가게 (협업 필터링)  우선순위 1순위!
         try:
-            print("\n[1/5] AI 추천 가게 (협업 필터링) 중...")
+            logger.debug("[1/5] AI 추천 가게 (협업 필터링) 중...")
             cf_stores = self.recommend_cf_stores(
                 user_id=request.user_id,
                 user_lat=user_lat,
                 user_lon=user_lon,
                 user_visit_data=user_visit_data
             )
-            print(f"AI 추천 가게 {len(cf_stores)}개 추천 완료")
+            logger.debug("AI 추천 가게 %d개 추천 완료", len(cf_stores))
         except Exception as e:
-            print(f"AI 추천 가게 추천 실패: {str(e)}")
+            logger.warning("AI 추천 가게 추천 실패: %s", e)
             cf_stores = []
         recommendations.append(CategoryRecommendation(
             category="AI 추천 가게",
             stores=cf_stores
         ))
         
-        # AI가 추천한 가게 주소들 (다른 카테고리에서 중복 제거용)
-        ai_recommended_addresses = set(store.address for store in cf_stores)
-        print(f"AI 추천 가게 {len(ai_recommended_addresses)}개 주소 보호")
-        
-        # 2. 이벤트 참여 가게
-        try:
-            print("\n[2/5] 이벤트 참여 가게 추천 중...")
-            event_stores_raw = self.recommend_event_stores(
-                user_lat=user_lat,
-                user_lon=user_lon,
-                event_stores_data=event_stores_data
-            )
-            # AI 추천과 중복 제거
-            event_stores = [s for s in event_stores_raw if s.address not in ai_recommended_addresses]
-            if len(event_stores_raw) > len(event_stores):
-                print(f"   AI 추천과 중복되는 {len(event_stores_raw) - len(event_stores)}개 가게 제외")
-            print(f"이벤트 가게 {len(event_stores)}개 추천 완료")
-        except Exception as e:
-            print(f"이벤트 가게 추천 실패: {str(e)}")
-            event_stores = []
-        recommendations.append(CategoryRecommendation(
-            category="이벤트 참여 가게",
-            stores=event_stores
-        ))
-        
-        # 3. 신규 가입 가게
-        try:
-            print("\n[3/5] 신규 가입 가게 추천 중...")
-            new_stores_raw = self.recommend_new_stores(
-                user_lat=user_lat,
-                user_lon=user_lon,
-                new_stores_data=new_stores_data
-            )
-            # AI 추천과 중복 제거
-            new_stores = [s for s in new_stores_raw if s.address not in ai_recommended_addresses]
-            if len(new_stores_raw) > len(new_stores):
-                print(f"   AI 추천과 중복되는 {len(new_stores_raw) - len(new_stores)}개 가게 제외")
-            print(f"신규 가게 {len(new_stores)}개 추천 완료")
-        except Exception as e:
-            print(f"신규 가게 추천 실패: {str(e)}")
-            new_stores = []
-        recommendations.append(CategoryRecommendation(
-            category="신규 가입 가게",
-            stores=new_stores
-        ))
+        # AI가 추천한 가게 주소들 (다른 카테고리에서는 후보 단계에서 제외, 모든 카테고리가 공유하므로 frozenset)
+        ai_recommended_addresses = frozenset(store.address for store in cf_stores)
+        logger.debug("AI 추천 가게 %d개 주소 보호", len(ai_recommended_addresses))
         
-        # 4. 인기 가게
+        # 이벤트/신규/인기 가게 주소를 한 번에 조회하고 거리도 한 번에 계산
+        # (실패하면 각 카테고리에서 따로 조회하도록 None으로 둠)
         try:
-            print("\n[4/5] 인기 가게 추천 중...")
-            popular_stores_raw = self.recommend_popular_stores(
-                user_lat=user_lat,
-                user_lon=user_lon,
-                popular_stores_data=popular_stores_data
+            store_lookup = self._lookup_stores(
+                user_lat, user_lon,
+                (d.get("store_address") for data in (event_stores_data, new_stores_data, popular_stores_data) for d in data)
             )
-            # AI 추천과 중복 제거
-            popular_stores = [s for s in popular_stores_raw if s.address not in ai_recommended_addresses]
-            if len(popular_stores_raw) > len(popular_stores):
-                print(f"   AI 추천과 중복되는 {len(popular_stores_raw) - len(popular_stores)}개 가게 제외")
-            print(f"인기 가게 {len(popular_stores)}개 추천 완료")
         except Exception as e:
-            print(f"인기 가게 추천 실패: {str(e)}")
-            popular_stores = []
-        recommendations.append(CategoryRecommendation(
-            category="인기 가게",
-            stores=popular_stores
-        ))
+            logger.warning("가게 일괄 조회 실패: %s", e)
+            store_lookup = None
+        
+        # 2~4. 이벤트 참여 / 신규 가입 / 인기 가게 (모두 같은 방식으로 호출)
+        list_categories = (
+            ("[2/5]", "이벤트 참여 가게", self.recommend_event_stores, event_stores_data),
+            ("[3/5]", "신규 가입 가게", self.recommend_new_stores, new_stores_data),
+            ("[4/5]", "인기 가게", self.recommend_popular_stores, popular_stores_data),
+        )
+        for step, category, recommend, stores_data in list_categories:
+            try:
+                logger.debug("%s %s 추천 중...", step, category)
+                stores = recommend(
+                    user_lat, user_lon, stores_data,
+                    store_lookup=store_lookup,
+                    excluded_addresses=ai_recommended_addresses
+                )
+                logger.debug("%s %d개 추천 완료", category, len(stores))
+            except Exception as e:
+                logger.warning("%s 추천 실패: %s", category, e)
+                stores = []
+            recommendations.append(CategoryRecommendation(
+                category=category,
+                stores=stores
+            ))
         
         # 이미 추천된 가게 주소들 모으기 (가까운 가게에서 제외하기 위해)
-        all_recommended_addresses = ai_recommended_addresses.copy()
-        for store in event_stores:
-            all_recommended_addresses.add(store.address)
-        for store in new_stores:
-            all_recommended_addresses.add(store.address)
-        for store in popular_stores:
-            all_recommended_addresses.add(store.address)
+        all_recommended_addresses = ai_recommended_addresses.union(
+            store.address for category in recommendations[1:] for store in category.stores
+        )
         
         # 5. 가까운 가게
         try:
-            print("\n[5/5] 가까운 가게 추천 중...")
-            nearby_stores_raw = self.recommend_nearby_stores(
+            logger.debug("[5/5] 가까운 가게 추천 중...")
+            # recommended_addresses에 AI 추천 주소도 들어 있으므로 따로 중복 제거하지 않음
+            nearby_stores = self.recommend_nearby_stores(
                 user_lat=user_lat,
                 user_lon=user_lon,
                 recommended_addresses=all_recommended_addresses
             )
-            # AI 추천과 중복 제거
-            nearby_stores = [s for s in nearby_stores_raw if s.address not in ai_recommended_addresses]
-            if len(nearby_stores_raw) > len(nearby_stores):
-                print(f"   AI 추천과 중복되는 {len(nearby_stores_raw) - len(nearby_stores)}개 가게 제외")
-            print(f"가까운 가게 {len(nearby_stores)}개 추천 완료")
+            logger.debug("가까운 가게 %d개 추천 완료", len(nearby_stores))
         except Exception as e:
-            print(f"가까운 가게 추천 실패: {str(e)}")
+            logger.warning("가까운 가게 추천 실패: %s", e)
             nearby_stores = []
         recommendations.append(CategoryRecommendation(
             category="가까운 가게",
@@ -1085,17 +1061,30 @@ class RecommendationService:
         ))
         
         # 전체 통계
-        total_stores = sum(len(cat.stores) for cat in recommendations)
-        print("\n" + "="*60)
-        print(f"전체 추천 완료: 총 {total_stores}개 가게")
-        print("="*60)
-        print("카테고리별 추천 결과:")
-        for cat in recommendations:
-            print(f"  • {cat.category}: {len(cat.stores)}개")
-        print("="*60 + "\n")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("전체 추천 완료: 총 %d개 가게 (%s)",
+                         sum(len(cat.stores) for cat in recommendations),
+                         ", ".join(f"{cat.category} {len(cat.stores)}개" for cat in recommendations))
         
         return RecommendationResponse(
             success=True,
             user_id=request.user_id,
             recommendations=recommendations
         )
+
+
+# 프로세스 전체에서 공유하는 추천 서비스 (가게 데이터는 한 번만 로드)
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_service() -> RecommendationService:
+    """
+    공유 추천 서비스 인스턴스 반환 (처음 호출될 때 생성하고 가게 데이터를 로드)
+    """
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = RecommendationService()
+    return _service
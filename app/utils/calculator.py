@@ -4,6 +4,7 @@
 import math
 from datetime import datetime, timedelta
 from typing import Dict
+import numpy as np
 
 
 def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
@@ -32,12 +33,66 @@ def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> fl
     dlat = lat2_rad - lat1_rad
     dlon = lon2_rad - lon1_rad
     
-    # Haversine 공식
+    # Haversine 공식 (2 * atan2(sqrt(a), sqrt(1 - a))와 같은 값, 반올림 오차로 a가 1을 넘지 않도록 제한)
     a = math.sin(dlat / 2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlon / 2)**2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+    c = 2 * math.asin(math.sqrt(min(a, 1.0)))
     
-    distance = R * c
-    return round(distance, 2)
+    # 반올림하지 않은 값 반환 (점수 계산에 그대로 사용하고 표시할 때만 자릿수 지정)
+    return R * c
+
+
+def haversine_distances_rad(
+    lat_rad: float,
+    lon_rad: float,
+    lats_rad: np.ndarray,
+    lons_rad: np.ndarray,
+    cos_lats: np.ndarray
+) -> np.ndarray:
+    """
+    한 지점에서 여러 지점까지의 거리를 한 번에 계산 (km)
+    haversine_distance와 같은 공식을 NumPy 배열 연산으로 수행하며,
+    대상 지점들의 라디안 좌표와 cos(위도)는 미리 계산해 두고 재사용
+    
+    Args:
+        lat_rad: 기준 지점의 위도 (라디안)
+        lon_rad: 기준 지점의 경도 (라디안)
+        lats_rad: 대상 지점들의 위도 배열 (라디안)
+        lons_rad: 대상 지점들의 경도 배열 (라디안)
+        cos_lats: 대상 지점들의 cos(위도) 배열
+    
+    Returns:
+        거리 배열 (km)
+    """
+    R = 6371.0
+    
+    dlat = lats_rad - lat_rad
+    dlon = lons_rad - lon_rad
+    
+    a = np.sin(dlat / 2)**2 + math.cos(lat_rad) * cos_lats * np.sin(dlon / 2)**2
+    c = 2 * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+    
+    return R * c
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    점수 상위 k개의 위치를 점수 내림차순으로 반환 (동점이면 앞 위치 우선)
+    전체 정렬 대신 np.partition으로 k번째 점수만 찾고 그 이상인 것만 정렬
+    
+    Args:
+        scores: 점수 배열
+        k: 선택할 개수
+    
+    Returns:
+        상위 k개의 인덱스 배열
+    """
+    n = len(scores)
+    if n <= k:
+        return np.argsort(-scores, kind='stable')
+    
+    kth_score = np.partition(scores, n - k)[n - k]
+    candidates = np.flatnonzero(scores >= kth_score)
+    return candidates[np.argsort(-scores[candidates], kind='stable')][:k]
 
 
 def calculate_distance_score(distance_km: float, max_distance_km: float = 5.0) -> float:
@@ -56,7 +111,7 @@ def calculate_distance_score(distance_km: float, max_distance_km: float = 5.0) -
     
     # 가까울수록 높은 점수 (최대 30점)
     score = 30 * (1 - (distance_km / max_distance_km))
-    return round(score, 2)
+    return score
 
 
 def calculate_rating_score(rating: float, review_count: int) -> float:
@@ -77,7 +132,17 @@ def calculate_rating_score(rating: float, review_count: int) -> float:
     # 리뷰가 많을수록 신뢰도 증가
     review_score = min(5, math.log(review_count + 1) / math.log(100) * 5)
     
-    return round(rating_score + review_score, 2)
+    return rating_score + review_score
+
+
+# 이벤트 타입별 점수 (호출마다 dict를 새로 만들지 않도록 모듈에 한 번만 정의)
+_EVENT_TYPE_SCORES = {
+    "DOUBLE_EXP": 15,
+    "TRIPLE_EXP": 20,
+    "BONUS_STAMP": 10,
+    "DISCOUNT": 8,
+    "FREE_ITEM": 12
+}
 
 
 def calculate_event_score(events: list, current_date: datetime = None) -> float:
@@ -100,18 +165,9 @@ def calculate_event_score(events: list, current_date: datetime = None) -> float:
     total_score = 0.0
     
     for event in events:
-        # 이벤트 타입별 점수
-        event_type_scores = {
-            "DOUBLE_EXP": 15,
-            "TRIPLE_EXP": 20,
-            "BONUS_STAMP": 10,
-            "DISCOUNT": 8,
-            "FREE_ITEM": 12
-        }
-        
         # 진행 중인 이벤트인지 확인
         if event.start_date <= current_date <= event.end_date:
-            base_score = event_type_scores.get(event.event_type, 5)
+            base_score = _EVENT_TYPE_SCORES.get(event.event_type, 5)
             
             # 경험치 배수가 있으면 추가 점수
             if hasattr(event, 'exp_multiplier') and event.exp_multiplier:
@@ -120,7 +176,7 @@ def calculate_event_score(events: list, current_date: datetime = None) -> float:
             total_score += base_score
     
     # 최대 30점으로 제한
-    return round(min(total_score, 30.0), 2)
+    return min(total_score, 30.0)
 
 
 def calculate_new_store_score(is_new: bool, opened_date: datetime = None, current_date: datetime = None) -> float:
@@ -151,7 +207,7 @@ def calculate_new_store_score(is_new: bool, opened_date: datetime = None, curren
     # 최근 오픈일수록 높은 점수 (최대 20점)
     score = 20 * (1 - (days_since_open / 30))
     
-    return round(score, 2)
+    return score
 
 
 def calculate_recommendation_score(
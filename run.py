@@ -1,6 +1,7 @@
 """
 서버 실행 스크립트
 """
+import os
 import uvicorn
 
 
@@ -9,7 +10,8 @@ if __name__ == "__main__":
         "app.main:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,
+        # 워커 수 (기본값: CPU 코어 수), 개발 중 자동 리로드는 python -m app.main 사용
+        workers=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)),
         log_level="info"
     )
 
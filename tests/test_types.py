@@ -0,0 +1,34 @@
+"""
+요청 모델 공통 필드 타입 테스트
+"""
+from datetime import datetime, timedelta, timezone
+
+from app.models.request import NEW_STORE_LIST
+
+
+def _joined_date(value):
+    return NEW_STORE_LIST.validate_python([{"store_address": "주소", "joined_date": value}])[0].joined_date
+
+
+def test_date_only_string_becomes_midnight():
+    assert _joined_date("2025-11-05") == datetime(2025, 11, 5)
+
+
+def test_naive_datetime_is_kept():
+    assert _joined_date("2025-11-05T09:30:00") == datetime(2025, 11, 5, 9, 30)
+
+
+def test_aware_datetime_becomes_naive_local_time():
+    joined = _joined_date("2025-11-05T09:00:00+09:00")
+    
+    assert joined.tzinfo is None
+    expected = datetime(2025, 11, 5, 0, 0, tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+    assert joined == expected
+    # recommend_new_stores처럼 naive datetime.now()와 빼도 TypeError가 나지 않아야 함
+    assert isinstance((datetime.now() - joined).days, int)
+
+
+def test_aware_datetime_keeps_elapsed_days():
+    joined = _joined_date((datetime.now(timezone.utc) - timedelta(days=3, hours=1)).isoformat())
+    
+    assert (datetime.now() - joined).days == 3